@@ -13,23 +13,37 @@ Endpoints:
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
+import orjson
 from typing import Optional, List, Dict
 import cv2
 import numpy as np
-import base64
+
+# pybase64 binds the SIMD-accelerated libbase64; fall back to stdlib
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
+
 from datetime import datetime
-import json
+import os
+import asyncio
+import concurrent.futures
+import threading
+import time
 
 from core import FocusScorer, EventDetector, AlertManager
 from session_tracker import SessionTracker
 from ultralytics import YOLO
+import torch
 
 # Initialize FastAPI
 app = FastAPI(
     title="AI Learning Companion API",
     description="Real-time focus tracking system using YOLO",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -46,8 +60,110 @@ det_model = None
 pose_model = None
 session_tracker = SessionTracker()
 
+# Dynamic batching of inference requests across concurrent sessions
+MAX_BATCH_SIZE = 8
+BATCH_WAIT_MS = 5
+inference_queue: Optional[asyncio.Queue] = None
+_batcher_task = None
+
+# Thread pool for base64 + JPEG decode; both release the GIL, so decoding
+# off the event loop keeps other websockets/HTTP requests responsive
+DECODE_POOL = concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count())
+
+class SessionCtx:
+    """
+    Per-session state with a fixed slot layout.
+
+    Attribute access on __slots__ is a C-level descriptor lookup, which
+    beats the five hashed dict lookups the per-frame path was doing.
+    """
+    __slots__ = (
+        'session_id', 'user_id', 'session_name', 'started_at',
+        'scorer', 'detector', 'alert_manager',
+    )
+
+    def __init__(self, session_id, user_id, session_name, started_at,
+                 scorer, detector, alert_manager):
+        self.session_id = session_id
+        self.user_id = user_id
+        self.session_name = session_name
+        self.started_at = started_at
+        self.scorer = scorer
+        self.detector = detector
+        self.alert_manager = alert_manager
+
+    def to_dict(self) -> Dict:
+        """Summary dict for listing/debug endpoints"""
+        return {
+            'session_id': self.session_id,
+            'user_id': self.user_id,
+            'session_name': self.session_name,
+            'started_at': self.started_at,
+            'status': 'active',
+        }
+
+
+class SessionRegistry:
+    """
+    Sharded storage for active sessions.
+
+    Sessions are spread over 16 independently locked shards so
+    concurrent add/remove from different handlers (and worker threads)
+    never contend on one lock, and shutdown can snapshot shard by shard
+    instead of copying the whole table. Exposes the dict operations the
+    handlers use.
+    """
+    NUM_SHARDS = 16
+
+    def __init__(self):
+        self._shards = [{} for _ in range(self.NUM_SHARDS)]
+        self._locks = [threading.Lock() for _ in range(self.NUM_SHARDS)]
+
+    def _shard(self, session_id: str) -> int:
+        return hash(session_id) & (self.NUM_SHARDS - 1)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._shards[self._shard(session_id)]
+
+    def __getitem__(self, session_id: str) -> SessionCtx:
+        return self._shards[self._shard(session_id)][session_id]
+
+    def __setitem__(self, session_id: str, ctx: SessionCtx):
+        i = self._shard(session_id)
+        with self._locks[i]:
+            self._shards[i][session_id] = ctx
+
+    def __delitem__(self, session_id: str):
+        i = self._shard(session_id)
+        with self._locks[i]:
+            del self._shards[i][session_id]
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+    def keys(self):
+        for i, shard in enumerate(self._shards):
+            # Snapshot under the lock, yield outside it — a caller that
+            # suspends mid-iteration must not hold the shard lock
+            with self._locks[i]:
+                snapshot = list(shard.keys())
+            yield from snapshot
+
+    def values(self):
+        for i, shard in enumerate(self._shards):
+            with self._locks[i]:
+                snapshot = list(shard.values())
+            yield from snapshot
+
+    def items(self):
+        for i, shard in enumerate(self._shards):
+            with self._locks[i]:
+                snapshot = list(shard.items())
+            yield from snapshot
+
+
 # Active sessions storage
-active_sessions:  Dict[str, Dict] = {}
+active_sessions = SessionRegistry()
 
 
 # ==================== Pydantic Models ====================
@@ -92,21 +208,94 @@ class SessionStopResponse(BaseModel):
 
 # ==================== Startup/Shutdown ====================
 
+def _load_model(weights_path: str) -> YOLO:
+    """
+    Load a YOLO model, preferring a TensorRT FP16 engine when CUDA is available.
+
+    Exports the .pt checkpoint to a .engine file once (first startup on a GPU
+    machine); later startups just load the engine. Falls back to the plain
+    PyTorch checkpoint on CPU-only machines or if export fails.
+    """
+    engine_path = os.path.splitext(weights_path)[0] + ".engine"
+
+    try:
+        import torch
+        cuda_available = torch.cuda.is_available()
+    except ImportError:
+        cuda_available = False
+
+    if cuda_available:
+        try:
+            if not os.path.exists(engine_path):
+                print(f"⚙️ Exporting {weights_path} to TensorRT FP16 engine (one-time)...")
+                YOLO(weights_path).export(
+                    format="engine", half=True, dynamic=False, imgsz=640, workspace=4
+                )
+            return YOLO(engine_path)
+        except Exception as e:
+            print(f"⚠️ TensorRT engine unavailable for {weights_path}: {e}")
+            print("   Falling back to PyTorch checkpoint")
+
+    return YOLO(weights_path)
+
+
+def _compile_model(model: YOLO) -> YOLO:
+    """
+    Fuse kernels for the PyTorch fallback path via torch.compile.
+
+    Only applies to .pt checkpoints on CUDA (TensorRT engines are already
+    fused); with frames pinned to 640px the compiled graph is reused
+    every call, removing per-frame kernel launch overhead.
+    """
+    try:
+        if torch.cuda.is_available() and hasattr(model, 'model') and isinstance(
+            model.model, torch.nn.Module
+        ):
+            model.to('cuda')
+            model.fuse()  # fold Conv+BN pairs
+            model.model = torch.compile(
+                model.model, mode="reduce-overhead", fullgraph=False
+            )
+            # Warm up so compilation happens at startup, not first request
+            dummy = np.zeros((INFERENCE_SIZE, INFERENCE_SIZE, 3), dtype=np.uint8)
+            model(dummy, imgsz=INFERENCE_SIZE, verbose=False)
+    except Exception as e:
+        print(f"⚠️ torch.compile unavailable: {e}")
+    return model
+
+
 @app.on_event("startup")
 async def startup_event():
     """Load YOLO models on startup"""
     global det_model, pose_model
-    
+
+    global inference_queue, _batcher_task
+
+    # Backend tuning: with the input shape pinned to 640px, letting cuDNN
+    # autotune conv algorithms and enabling TF32 matmul are free speedups
+    if torch.cuda.is_available():
+        torch.backends.cudnn.benchmark = True
+        torch.backends.cudnn.deterministic = False
+        torch.backends.cuda.matmul.allow_tf32 = True
+        torch.set_float32_matmul_precision('high')
+
     print("🚀 Loading YOLO models...")
-    det_model = YOLO("models/yolov8n.pt")
-    pose_model = YOLO("models/yolov8n-pose.pt")
+    det_model = _compile_model(_load_model("models/yolov8n.pt"))
+    pose_model = _compile_model(_load_model("models/yolov8n-pose.pt"))
     print("✅ Models loaded successfully!")
 
+    # Start the shared dynamic-batching inference worker
+    inference_queue = asyncio.Queue()
+    _batcher_task = asyncio.create_task(_inference_batcher())
+
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
     print("🛑 Shutting down API...")
+    # Stop the inference worker
+    if _batcher_task is not None:
+        _batcher_task.cancel()
     # Save all active sessions
     for session_id in list(active_sessions.keys()):
         _stop_session(session_id)
@@ -114,21 +303,126 @@ async def shutdown_event():
 
 # ==================== Helper Functions ====================
 
+# YOLO letterboxes everything to this size anyway; resizing right after
+# decode keeps the preprocess from chewing on full webcam resolution
+INFERENCE_SIZE = 640
+
+
+def decode_frame_bytes(img_bytes: bytes) -> np.ndarray:
+    """Decode raw image bytes (JPEG/PNG) to numpy array"""
+    try:
+        nparr = np.frombuffer(img_bytes, np.uint8)
+        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        if frame is None:
+            raise ValueError("Not a valid image")
+
+        # Downscale large frames to the inference size (longest side)
+        h, w = frame.shape[:2]
+        scale = INFERENCE_SIZE / max(h, w)
+        if scale < 1.0:
+            frame = cv2.resize(
+                frame, (int(w * scale), int(h * scale)),
+                interpolation=cv2.INTER_LINEAR
+            )
+        return frame
+    except Exception as e:
+        raise ValueError(f"Failed to decode frame: {str(e)}")
+
+
+# pybase64 can decode straight to a mutable bytearray, skipping the
+# immutable-bytes copy stdlib b64decode makes per frame
+_b64decode_raw = getattr(base64, 'b64decode_as_bytearray', base64.b64decode)
+
+
 def decode_base64_frame(base64_str: str) -> np.ndarray:
     """Decode base64 string to numpy array (image)"""
     try:
         # Remove data URL prefix if present
         if ',' in base64_str:
             base64_str = base64_str.split(',')[1]
-        
-        img_bytes = base64.b64decode(base64_str)
-        nparr = np.frombuffer(img_bytes, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        return frame
-    except Exception as e: 
+
+        img_bytes = _b64decode_raw(base64_str)
+        return decode_frame_bytes(img_bytes)
+    except Exception as e:
         raise ValueError(f"Failed to decode frame: {str(e)}")
 
 
+def _det_forward(frames):
+    """Detection forward pass without autograd, FP16 on CUDA"""
+    with torch.inference_mode(), torch.cuda.amp.autocast(
+        dtype=torch.float16, enabled=torch.cuda.is_available()
+    ):
+        return det_model(frames, conf=0.5, verbose=False)
+
+
+def _pose_forward(frames):
+    """Pose forward pass without autograd, FP16 on CUDA"""
+    with torch.inference_mode(), torch.cuda.amp.autocast(
+        dtype=torch.float16, enabled=torch.cuda.is_available()
+    ):
+        return pose_model(frames, verbose=False)
+
+
+async def _decode_in_pool(decoder, payload):
+    """Run a frame decoder in the decode thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(DECODE_POOL, decoder, payload)
+
+
+async def _inference_batcher():
+    """
+    Background worker that batches frames from all sessions.
+
+    With N concurrent sessions the model would otherwise see N batch-1
+    calls back to back. This task drains up to MAX_BATCH_SIZE pending
+    frames (waiting at most BATCH_WAIT_MS for stragglers), runs one
+    batched detection + pose pass, and resolves each caller's future
+    with its own slice of the results.
+    """
+    while True:
+        frame, future = await inference_queue.get()
+        frames = [frame]
+        futures = [future]
+
+        # Give other sessions a short window to join the batch
+        deadline = asyncio.get_running_loop().time() + BATCH_WAIT_MS / 1000
+        while len(frames) < MAX_BATCH_SIZE:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                frame, future = await asyncio.wait_for(inference_queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            frames.append(frame)
+            futures.append(future)
+
+        try:
+            det_results, pose_results = await asyncio.gather(
+                asyncio.to_thread(_det_forward, frames),
+                asyncio.to_thread(_pose_forward, frames),
+            )
+            for i, fut in enumerate(futures):
+                if not fut.done():
+                    fut.set_result(([det_results[i]], [pose_results[i]]))
+        except Exception as e:
+            for fut in futures:
+                if not fut.done():
+                    fut.set_exception(e)
+
+
+async def run_inference(frame: np.ndarray):
+    """
+    Run detection + pose on one frame via the shared batching worker.
+
+    Enqueues the frame and awaits its result; frames from concurrent
+    sessions submitted in the same window share one batched forward pass.
+    """
+    future = asyncio.get_running_loop().create_future()
+    await inference_queue.put((frame, future))
+    return await future
+
+
 def encode_frame_to_base64(frame: np.ndarray) -> str:
     """Encode numpy array to base64 string"""
     _, buffer = cv2.imencode('.jpg', frame)
@@ -140,18 +434,19 @@ def _stop_session(session_id: str) -> Dict:
     if session_id not in active_sessions:
         return None
     
-    session_data = active_sessions[session_id]
-    scorer = session_data['scorer']
-    
+    ctx = active_sessions[session_id]
+    scorer = ctx.scorer
+
     # Get final statistics
     stats = scorer.get_session_stats()
-    
-    # Save to tracker
+
+    # Save to tracker, reusing the stats computed above
     session_tracker.save_session(
         session_id=session_id,
-        user_id=session_data['user_id'],
-        session_name=session_data.get('session_name'),
-        scorer=scorer
+        user_id=ctx.user_id,
+        session_name=ctx.session_name,
+        scorer=scorer,
+        stats=stats
     )
     
     # Remove from active sessions
@@ -181,80 +476,111 @@ async def start_session(request: SessionStartRequest):
     # Generate session ID
     session_id = session_tracker.create_session_id(request.user_id)
     
-    # Initialize components
-    scorer = FocusScorer()
-    detector = EventDetector()
-    alert_manager = AlertManager()
-    
     # Store in active sessions
-    active_sessions[session_id] = {
-        'session_id': session_id,
-        'user_id': request.user_id,
-        'session_name':  request.session_name,
-        'started_at': datetime.now().isoformat(),
-        'scorer': scorer,
-        'detector': detector,
-        'alert_manager': alert_manager,
-    }
-    
+    ctx = SessionCtx(
+        session_id=session_id,
+        user_id=request.user_id,
+        session_name=request.session_name,
+        started_at=datetime.now().isoformat(),
+        scorer=FocusScorer(),
+        detector=EventDetector(),
+        alert_manager=AlertManager(),
+    )
+    active_sessions[session_id] = ctx
+
     return SessionStartResponse(
         session_id=session_id,
-        started_at=active_sessions[session_id]['started_at'],
+        started_at=ctx.started_at,
         message="Session started successfully"
     )
 
 
-@app.post("/api/frame/process", response_model=FrameProcessResponse)
-async def process_frame(request: FrameProcessRequest):
-    """
-    Xử lý một frame và trả về kết quả focus score
-    """
-    # Check if session exists
-    if request.session_id not in active_sessions:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
-    session_data = active_sessions[request.session_id]
-    scorer = session_data['scorer']
-    detector = session_data['detector']
-    alert_manager = session_data['alert_manager']
-    
-    # Decode frame
-    try:
-        frame = decode_base64_frame(request.frame_base64)
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    
-    # Run detection
-    det_results = det_model(frame, conf=0.5, verbose=False)
-    pose_results = pose_model(frame, verbose=False)
-    
+async def _process_decoded_frame(
+    session_id: str,
+    frame: np.ndarray,
+    timestamp: Optional[float] = None
+) -> FrameProcessResponse:
+    """Shared detection/scoring pipeline for the frame-processing endpoints"""
+    ctx = active_sessions[session_id]
+    scorer = ctx.scorer
+    detector = ctx.detector
+    alert_manager = ctx.alert_manager
+
+    # Run detection + pose concurrently
+    det_results, pose_results = await run_inference(frame)
+
+    # ✅ One frame clock shared by detector, scorer and alert cooldown
+    now = time.time()
+
     # Detect events
-    events = detector.detect_events(frame, det_results, pose_results, det_model, pose_model)
-    
+    events = detector.detect_events(frame, det_results, pose_results, det_model, pose_model, now=now)
+
     # Update focus score
-    focus_score = scorer.update(events)
+    focus_score = scorer.update(events, now=now)
     level, _ = scorer.get_focus_level()
-    
+
     # Check for alerts
-    distraction_duration = scorer.get_distraction_duration()
-    should_alert = alert_manager.should_alert(focus_score, distraction_duration)
+    distraction_duration = scorer.get_distraction_duration(now=now)
+    should_alert = alert_manager.should_alert(focus_score, distraction_duration, now=now)
     alert_message = None
-    
+
     if should_alert:
         alert_message = alert_manager.get_alert_message(focus_score, level)
-    
+
     return FrameProcessResponse(
-        session_id=request.session_id,
+        session_id=session_id,
         focus_score=focus_score,
         focus_level=level,
         events=events,
         distraction_duration=distraction_duration,
         should_alert=should_alert,
         alert_message=alert_message,
-        timestamp=request.timestamp or datetime.now().timestamp()
+        # time.time() is a direct C call; datetime.now().timestamp() builds
+        # a datetime object per frame for the same float
+        timestamp=timestamp or now
     )
 
 
+@app.post("/api/frame/process", response_model=FrameProcessResponse)
+async def process_frame(request: FrameProcessRequest):
+    """
+    Xử lý một frame và trả về kết quả focus score
+    """
+    # Check if session exists
+    if request.session_id not in active_sessions:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    # Decode frame
+    try:
+        frame = await _decode_in_pool(decode_base64_frame, request.frame_base64)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return await _process_decoded_frame(request.session_id, frame, request.timestamp)
+
+
+@app.post("/api/frame/process_raw", response_model=FrameProcessResponse)
+async def process_frame_raw(
+    session_id: str,
+    file: UploadFile = File(...),
+    timestamp: Optional[float] = None
+):
+    """
+    Xử lý một frame (raw JPEG/PNG bytes, không cần base64)
+    """
+    # Check if session exists
+    if session_id not in active_sessions:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    # Decode frame
+    try:
+        frame = await _decode_in_pool(decode_frame_bytes, await file.read())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return await _process_decoded_frame(session_id, frame, timestamp)
+
+
 @app.post("/api/session/stop", response_model=SessionStopResponse)
 async def stop_session(request: SessionStopRequest):
     """
@@ -279,17 +605,12 @@ async def get_session(session_id: str):
     """
     # Check active sessions
     if session_id in active_sessions:
-        session_data = active_sessions[session_id]
-        scorer = session_data['scorer']
-        
+        ctx = active_sessions[session_id]
+
         return {
-            "session_id": session_id,
-            "user_id": session_data['user_id'],
-            "session_name": session_data.get('session_name'),
-            "status": "active",
-            "started_at": session_data['started_at'],
-            "current_score": scorer.score,
-            "current_level": scorer.get_focus_level()[0],
+            **ctx.to_dict(),
+            "current_score": ctx.scorer.score,
+            "current_level": ctx.scorer.get_focus_level()[0],
         }
     
     # Check saved sessions
@@ -307,8 +628,7 @@ async def get_session_stats(session_id: str):
     """
     # Check active sessions
     if session_id in active_sessions:
-        scorer = active_sessions[session_id]['scorer']
-        return scorer.get_session_stats()
+        return active_sessions[session_id].scorer.get_session_stats()
     
     # Check saved sessions
     session = session_tracker.get_session(session_id)
@@ -329,15 +649,9 @@ async def list_sessions(user_id: Optional[str] = None, limit: int = 50):
     }
     
     # Active sessions
-    for session_id, session_data in active_sessions.items():
-        if user_id is None or session_data['user_id'] == user_id:
-            result['active'].append({
-                'session_id': session_id,
-                'user_id': session_data['user_id'],
-                'session_name': session_data.get('session_name'),
-                'started_at': session_data['started_at'],
-                'status': 'active'
-            })
+    for ctx in active_sessions.values():
+        if user_id is None or ctx.user_id == user_id:
+            result['active'].append(ctx.to_dict())
     
     # Saved sessions
     saved = session_tracker.get_user_sessions(user_id, limit=limit) if user_id else session_tracker.get_all_sessions(limit=limit)
@@ -353,7 +667,8 @@ async def websocket_focus_tracking(websocket: WebSocket, session_id: str):
     """
     WebSocket endpoint for real-time focus tracking
     
-    Client sends:  {"frame":  "base64_encoded_image"}
+    Client sends either a binary message with raw JPEG bytes (preferred,
+    skips the ~33% base64 overhead) or {"frame": "base64_encoded_image"}
     Server sends: {
         "focus_score": 85.5,
         "focus_level": "focused",
@@ -369,48 +684,83 @@ async def websocket_focus_tracking(websocket: WebSocket, session_id: str):
         await websocket.close()
         return
     
-    session_data = active_sessions[session_id]
-    scorer = session_data['scorer']
-    detector = session_data['detector']
-    alert_manager = session_data['alert_manager']
-    
+    ctx = active_sessions[session_id]
+    scorer = ctx.scorer
+    detector = ctx.detector
+    alert_manager = ctx.alert_manager
+
+    # One-slot frame buffer: the receiver overwrites it on every arrival,
+    # so if inference falls behind we process the newest frame and shed
+    # the stale ones instead of building a queue on the socket.
+    latest = {'message': None}
+    frame_ready = asyncio.Event()
+
+    async def _receiver():
+        try:
+            while True:
+                message = await websocket.receive()
+                latest['message'] = message
+                frame_ready.set()
+                if message.get('bytes') is None and message.get('text') is None:
+                    return  # disconnect message
+        except WebSocketDisconnect:
+            latest['message'] = None
+            frame_ready.set()
+
+    receiver_task = asyncio.create_task(_receiver())
+
     try:
         while True:
-            # Receive frame from client
-            data = await websocket.receive_json()
-            
-            if 'frame' not in data: 
-                await websocket.send_json({"error": "No frame provided"})
-                continue
-            
-            # Decode frame
+            # Take the latest frame, dropping any that arrived mid-inference
+            await frame_ready.wait()
+            frame_ready.clear()
+            message = latest['message']
+
+            if message is None:
+                raise WebSocketDisconnect()
+
             try:
-                frame = decode_base64_frame(data['frame'])
-            except ValueError as e: 
+                if message.get('bytes') is not None:
+                    frame = await _decode_in_pool(decode_frame_bytes, message['bytes'])
+                elif message.get('text') is not None:
+                    data = orjson.loads(message['text'])
+
+                    if 'frame' not in data:
+                        await websocket.send_json({"error": "No frame provided"})
+                        continue
+
+                    frame = await _decode_in_pool(decode_base64_frame, data['frame'])
+                else:
+                    # Disconnect message
+                    break
+            except ValueError as e:
                 await websocket.send_json({"error": str(e)})
                 continue
             
-            # Run detection
-            det_results = det_model(frame, conf=0.5, verbose=False)
-            pose_results = pose_model(frame, verbose=False)
-            
+            # Run detection + pose concurrently
+            det_results, pose_results = await run_inference(frame)
+
+            # ✅ One frame clock shared by detector, scorer and alert cooldown
+            now = time.time()
+
             # Detect events
-            events = detector.detect_events(frame, det_results, pose_results, det_model, pose_model)
+            events = detector.detect_events(frame, det_results, pose_results, det_model, pose_model, now=now)
             
             # Update focus score
-            focus_score = scorer.update(events)
+            focus_score = scorer.update(events, now=now)
             level, color = scorer.get_focus_level()
             
             # Check for alerts
-            distraction_duration = scorer.get_distraction_duration()
-            should_alert = alert_manager.should_alert(focus_score, distraction_duration)
+            distraction_duration = scorer.get_distraction_duration(now=now)
+            should_alert = alert_manager.should_alert(focus_score, distraction_duration, now=now)
             alert_message = None
             
             if should_alert: 
                 alert_message = alert_manager.get_alert_message(focus_score, level)
             
-            # Send response
-            await websocket.send_json({
+            # Send response (orjson is 3-5x faster than stdlib json here;
+            # wire format stays text JSON)
+            await websocket.send_text(orjson.dumps({
                 "focus_score": round(focus_score, 1),
                 "focus_level":  level,
                 "color": color,
@@ -418,14 +768,16 @@ async def websocket_focus_tracking(websocket: WebSocket, session_id: str):
                 "distraction_duration": distraction_duration,
                 "should_alert": should_alert,
                 "alert_message": alert_message,
-                "timestamp": datetime.now().timestamp()
-            })
+                "timestamp": now
+            }).decode())
             
-    except WebSocketDisconnect: 
+    except WebSocketDisconnect:
         print(f"WebSocket disconnected for session:  {session_id}")
     except Exception as e:
         print(f"WebSocket error:  {str(e)}")
         await websocket.close()
+    finally:
+        receiver_task.cancel()
 
 
 # ==================== Development Endpoints ====================
@@ -435,12 +787,12 @@ async def debug_sessions():
     """Debug endpoint to see all active session details"""
     return {
         session_id: {
-            'user_id': data['user_id'],
-            'started_at': data['started_at'],
-            'current_score': data['scorer'].score,
-            'history_length': len(data['scorer'].history)
+            'user_id': ctx.user_id,
+            'started_at': ctx.started_at,
+            'current_score': ctx.scorer.score,
+            'history_length': ctx.scorer.history_len
         }
-        for session_id, data in active_sessions.items()
+        for session_id, ctx in active_sessions.items()
     }
 
 
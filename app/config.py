@@ -25,6 +25,10 @@ class Settings(BaseSettings):
     # Security
     TOKEN_EXPIRY_DAYS: int = 7
     
+    # Cache
+    REDIS_URL: str = "redis://localhost:6379/0"
+
+    
     @property
     def cors_origins_list(self) -> list[str]:
         """Convert CORS_ORIGINS string to list"""
@@ -1,13 +1,17 @@
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import NullPool
 from app.config import settings
 
 # Create SQLAlchemy engine
+# Pooled connections: NullPool opened a fresh PostgreSQL handshake for
+# every request, which dominates short queries like the auth user lookup
 engine = create_engine(
     settings.DATABASE_URL,
-    poolclass=NullPool
+    pool_size=10,
+    max_overflow=20,
+    pool_pre_ping=True,
+    pool_recycle=1800,
 )
 
 # Create session factory
@@ -28,9 +32,21 @@ def get_db():
        db.close()
 
 
+# create_all round-trips to pg_catalog for every table; make sure it
+# only runs once per process no matter how many callers invoke init_db
+_initialized = False
+
+
 def init_db():
    """
-   Initialize database tables
+   Initialize database tables (idempotent, runs once per process)
    """
-   from app.models import user, session  # Import all models
-   Base.metadata.create_all(bind=engine)
\ No newline at end of file
+   global _initialized
+   if _initialized:
+       return
+
+   # Import all models so they are registered on Base.metadata
+   from app.models import user, session, learning_session, video_recording
+
+   Base.metadata.create_all(bind=engine)
+   _initialized = True
\ No newline at end of file
@@ -28,12 +28,17 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from cachetools import TTLCache
+import logging
 import secrets
+import time
 
 from app.config import settings
 from app.database import get_db
 from app.models.user import User
 
+logger = logging.getLogger(__name__)
+
 # Password hashing
 pwd_context = CryptContext(
     schemes=["argon2"],
@@ -43,6 +48,12 @@ pwd_context = CryptContext(
 # JWT Bearer token scheme
 security = HTTPBearer()
 
+# Short-lived caches so request bursts (e.g. websocket-authenticated
+# polling) don't redo the HMAC verify + user query on every call.
+# Expiry ('exp') is still checked on cache hits below.
+_jwt_cache = TTLCache(maxsize=10000, ttl=60)
+_user_cache = TTLCache(maxsize=10000, ttl=30)
+
 
 def hash_password(password: str) -> str:
     """Hash a password"""
@@ -73,44 +84,48 @@ def get_current_user(
     
     try:
         token = credentials.credentials
-        
-        # ✅ Debug
-        print(f"Received token: {token[: 50]}...")
-        print(f"Token parts: {len(token.split('.'))}")
-        
+
         # ✅ Validate JWT format
-        if len(token.split('.')) != 3:
-            print(f"❌ Invalid JWT format: only {len(token.split('.'))} parts")
+        parts = token.count('.') + 1
+        if parts != 3:
+            logger.debug("Invalid JWT format: only %d parts", parts)
             raise credentials_exception
-        
-        # ✅ Decode JWT token
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM]
-        )
-        
-        print(f"✅ Decoded payload: {payload}")
-        
+
+        # ✅ Decode JWT token (cached for repeat tokens)
+        payload = _jwt_cache.get(token)
+        if payload is None:
+            payload = jwt.decode(
+                token,
+                settings.SECRET_KEY,
+                algorithms=[settings.ALGORITHM]
+            )
+            _jwt_cache[token] = payload
+        elif payload.get("exp") is not None and payload["exp"] < time.time():
+            # Cached payload may outlive the token; re-check expiry
+            del _jwt_cache[token]
+            raise credentials_exception
+
         # ✅ Extract user_id from 'sub' claim
-        user_id:  str = payload.get("sub")
+        user_id: str = payload.get("sub")
         if user_id is None:
-            print("❌ No 'sub' claim in token")
+            logger.debug("No 'sub' claim in token")
             raise credentials_exception
-        
-            
-    except JWTError as e: 
-        print(f"❌ JWT decode error: {str(e)}")
+
+    except JWTError as e:
+        logger.debug("JWT decode error: %s", e)
         raise credentials_exception
     
-    # ✅ Get user from database
-    user = db.query(User).filter(User.id == user_id).first()
-    
+    # ✅ Get user from database (cached briefly per user_id)
+    user = _user_cache.get(user_id)
+    if user is None:
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is not None:
+            _user_cache[user_id] = user
+
     if user is None:
-        print(f"❌ User not found with id: {user_id}")
+        logger.debug("User not found with id: %s", user_id)
         raise credentials_exception
-    
-    print(f"✅ User authenticated: {user.email}")
+
     return user
 
 
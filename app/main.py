@@ -59,6 +59,7 @@
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from app.config import settings
 from app.database import init_db
 from app.routers import auth_router
@@ -72,7 +73,8 @@ init_db()
 app = FastAPI(
     title="FocusFlow API",
     description="Authentication and AI Focus Detection API for FocusFlow Learning Companion",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -110,12 +112,8 @@ async def startup_event():
     print("=" * 60)
     
     try:
-        from app.models.user import User
-        from app.models.learning_session import LearningSession
-        from app.models.video_recording import VideoRecording
-        from app.database import Base, engine
-        
-        Base.metadata.create_all(bind=engine)
+        # No-op if the import-time init_db() already ran
+        init_db()
         print("✅ Database tables ready")
     except Exception as e:
         print(f"⚠️  Database error: {e}")
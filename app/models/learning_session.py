@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Float, DateTime, ForeignKey, Numeric
+from sqlalchemy import Column, String, Integer, Float, DateTime, ForeignKey, Numeric, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -9,7 +9,11 @@ from decimal import Decimal
 
 class LearningSession(Base):
     __tablename__ = "learning_sessions"
-    
+    __table_args__ = (
+        # Covers the list_sessions query: filter by user, newest first
+        Index("ix_ls_user_started", "user_id", "started_at"),
+    )
+
     # Primary Key
     session_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
@@ -2,11 +2,11 @@
 Video Recording Model - Database model for video recordings
 """
 
-from sqlalchemy import Column, String, Integer, Float, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, String, Integer, Float, DateTime, Boolean, ForeignKey, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 import uuid
-from datetime import datetime, timezone
 
 from app.database import Base
 
@@ -16,6 +16,12 @@ class VideoRecording(Base):
     Model for storing video recording metadata
     """
     __tablename__ = "video_recordings"
+    __table_args__ = (
+        # Active-recording checks: partial index holding one row per live recording
+        Index("ix_vr_session_active", "session_id", "is_active", postgresql_where=text("is_active")),
+        # Newest-first listing/pagination
+        Index("ix_vr_started_desc", text("started_at DESC")),
+    )
     
     # Primary key
     recording_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
@@ -39,11 +45,13 @@ class VideoRecording(Base):
     # Status
     is_active = Column(Boolean, default=True)
     
-    # Timestamps
-    started_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    # Timestamps (filled by Postgres — no Python callable per INSERT/UPDATE)
+    started_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
     ended_at = Column(DateTime(timezone=True), nullable=True)
-    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
-    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    # onupdate=func.now() renders NOW() server-side in the UPDATE itself —
+    # still no Python callable, and no trigger needed
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
     
     # Cloud storage (optional)
     cloud_storage_url = Column(String, nullable=True)
@@ -54,27 +62,3 @@ class VideoRecording(Base):
     
     def __repr__(self):
         return f"<VideoRecording {self.recording_id} session={self.session_id} file={self.filename}>"
-    
-    def to_dict(self):
-        """Convert to dictionary"""
-        return {
-            'recording_id': str(self.recording_id),
-            'session_id': str(self.session_id),
-            'filename': self.filename,
-            'filepath': self.filepath,
-            'file_size_bytes': self.file_size_bytes,
-            'file_size_mb': round(self.file_size_bytes / (1024 * 1024), 2) if self.file_size_bytes else 0,
-            'fps': self.fps,
-            'resolution': f"{self.resolution_width}x{self.resolution_height}",
-            'resolution_width': self.resolution_width,
-            'resolution_height': self.resolution_height,
-            'codec': self.codec,
-            'duration_seconds': self.duration_seconds,
-            'frame_count': self.frame_count,
-            'is_active': self.is_active,
-            'started_at': self.started_at.isoformat() if self.started_at else None,
-            'ended_at': self.ended_at.isoformat() if self.ended_at else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'cloud_storage_url': self.cloud_storage_url,
-            'cloud_storage_provider': self.cloud_storage_provider,
-        }
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, Header, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import Optional
 from app.database import get_db
@@ -15,7 +16,7 @@ router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
 
 @router.post("/signup", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def signup(request: SignupRequest, db: Session = Depends(get_db)):
+async def signup(request: SignupRequest, db: Session = Depends(get_db)):
    """
    Register a new user
    
@@ -24,7 +25,10 @@ def signup(request: SignupRequest, db: Session = Depends(get_db)):
    - **password**: Password (minimum 6 characters)
    """
    try:
-        result = AuthService.signup(
+        # Password hashing is deliberately slow (~100ms+); run it in the
+        # threadpool so the event loop keeps serving other requests
+        result = await run_in_threadpool(
+            AuthService.signup,
             db=db,
             name=request.name,
             email=request.email,
@@ -39,14 +43,16 @@ def signup(request: SignupRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=UserResponse)
-def login(request: LoginRequest, db: Session = Depends(get_db)):
+async def login(request: LoginRequest, db: Session = Depends(get_db)):
    """
    Login an existing user
    
    - **email**: User's email address
    - **password**: User's password
    """
-   result = AuthService.login(
+   # bcrypt verify blocks for ~100ms+ — keep it off the event loop
+   result = await run_in_threadpool(
+       AuthService.login,
        db=db,
        email=request.email,
        password=request.password
@@ -1,13 +1,21 @@
+import asyncio
+import concurrent.futures
+import multiprocessing
 import json
+import os
+import orjson
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select, func, update
+from sqlalchemy.orm import Session, selectinload
 from datetime import datetime, timezone
-from typing import Dict, Optional
-import base64
+from typing import Dict, List, Optional
 import numpy as np
 import cv2
 from uuid import UUID
 import time  # ✅ Add for performance tracking
+import logging
+from dataclasses import dataclass
 
 from app.database import get_db
 from app.models.learning_session import LearningSession
@@ -18,20 +26,104 @@ from app.schemas.focus import (
     SessionResponse, 
     SessionListResponse,
     DetectionResult,
-    SessionStats
+    SessionStats,
+    SESSION_ADAPTER,
+    SESSION_LIST_ADAPTER
 )
-from app.services.focus_service import get_focus_service
+from app.services.cache import get_cache_service
+from app.services.focus_service import init_inference_worker, run_inference_worker
 from app.services.video_recording_service import get_video_recording_service
 from app.dependencies import get_current_user
 from utils.datetime_utils import now_utc, calculate_duration, make_aware
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api/focus", tags=["Focus Detection"])
 
-# Track session data in memory
-session_data: Dict[str, dict] = {}  # {session_id: {"total_frames": 0, "focused_frames": 0, "last_score": 100.0}}
+# ✅ Shared TypeAdapters (built once in app.schemas.focus): validate ORM rows
+# and serialize through Pydantic's Rust core, skipping FastAPI's
+# response_model revalidation
+_session_adapter = SESSION_ADAPTER
+_session_list_adapter = SESSION_LIST_ADAPTER
+
+
+def _session_json(session: LearningSession) -> dict:
+    """Serialize a LearningSession row to a JSON-ready dict"""
+    return _session_adapter.dump_python(
+        _session_adapter.validate_python(session, from_attributes=True),
+        mode="json",
+    )
+
+@dataclass(slots=True)
+class SessionState:
+    """In-memory per-session tracking (mirrors the DB counters)"""
+    total_frames: int = 0
+    focused_frames: int = 0
+    last_score: float = 100.0
+    consecutive_violations: int = 0  # Track consecutive violations for escalating alerts
+    recording_enabled: bool = False
+    total_violations: int = 0
+    phone_detected_count: int = 0
+    left_seat_count: int = 0
+    total_alerts: int = 0
+    gentle_alerts: int = 0
+    urgent_alerts: int = 0
+    focus_percentage: float = 100.0
+    duration_seconds: int = 0
+    last_thumb: Optional[np.ndarray] = None   # 32x18 grayscale thumbnail of last frame
+    last_result: Optional[dict] = None        # detection result reused when no motion
+
+
+@dataclass(slots=True)
+class ProcessingState:
+    """Per-session processing/performance metrics"""
+    frames_dropped: int = 0
+    total_processing_time: float = 0.0
+    max_processing_time: float = 0.0
+    frames_processed: int = 0
+    processing_ema: float = 0.0  # EMA of processing time, drives the pacing hint
+
+
+# Track session data in memory (slotted instances: smaller and faster
+# than one dict per session)
+session_data: Dict[str, SessionState] = {}
 
 # ✅ Track processing state (prevent frame queue buildup)
-session_processing: Dict[str, dict] = {}  # {session_id: {"is_processing": bool, "frames_dropped": int}}
+session_processing: Dict[str, ProcessingState] = {}
+
+# ✅ Shared inference process pool: each worker loads the model once and
+# sessions get true CPU parallelism instead of serializing on the GIL
+_inference_executor: Optional[concurrent.futures.ProcessPoolExecutor] = None
+
+
+def _get_inference_executor() -> concurrent.futures.ProcessPoolExecutor:
+    global _inference_executor
+    if _inference_executor is None:
+        # spawn (not fork): workers build their own model/CUDA context from
+        # scratch instead of inheriting — and possibly corrupting — the API
+        # process's threads and GPU state
+        _inference_executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=os.cpu_count() or 1,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_inference_worker,
+        )
+    return _inference_executor
+
+
+# ✅ Inference resolution: the detector only needs <=640px, full resolution
+# is kept solely for the recording file
+INFER_W, INFER_H = 640, 360
+
+# ✅ Motion gate: mean absolute difference between 32x18 grayscale thumbnails
+# below this threshold counts as "no motion" and reuses the last detection
+MOTION_DIFF_THRESHOLD = 2.0
+
+
+# ✅ Fixed alert messages (single string objects reused every frame)
+MSG_PHONE_DETECTED = "📱 Điện thoại phát hiện!  Hãy tập trung vào học tập."
+MSG_NO_PERSON = "⚠️ Không phát hiện người!  Vui lòng quay lại ghế."
+MSG_LEAVING_SEAT = "⚠️ Có vẻ bạn đang rời khỏi ghế. Hãy ngồi thẳng!"
+MSG_CONSECUTIVE_VIOLATIONS = "🚨 CẢNH BÁO:  Nhiều vi phạm liên tiếp!  Hãy tập trung!"
 
 
 # ==================== REST Endpoints ====================
@@ -71,12 +163,12 @@ async def create_session(
     db.commit()
     db.refresh(session)
     
-    print(f"✅ Created session: {session.session_id} for user {current_user.email}")
+    logger.info("✅ Created session: %s for user %s", session.session_id, current_user.email)
     
     return session
 
 
-@router.get("/sessions", response_model=SessionListResponse)
+@router.get("/sessions")
 async def list_sessions(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -91,39 +183,46 @@ async def list_sessions(
     - **page_size**: Number of items per page (max 100)
     - **status**: Filter by status (optional)
     """
-    query = db.query(LearningSession).filter(
-        LearningSession.user_id == current_user.id
-    )
-    
+    filters = [LearningSession.user_id == current_user.id]
+
     # Apply status filter if provided
     if status:
-        query = query.filter(LearningSession.status == status)
-    
-    # Get total count
-    total = query.count()
-    
+        filters.append(LearningSession.status == status)
+
+    # Get total count (plain SELECT count(*), no subquery wrap like .count())
+    total = db.scalar(
+        select(func.count()).select_from(LearningSession).where(*filters)
+    )
+
     # Apply pagination
     offset = (page - 1) * page_size
-    sessions = query.order_by(
+    sessions = db.query(LearningSession).options(
+        selectinload(LearningSession.video_recordings)
+    ).filter(*filters).order_by(
         LearningSession.started_at.desc()
     ).offset(offset).limit(page_size).all()
     
-    return {
-        "sessions": sessions,
+    return ORJSONResponse({
+        "sessions": _session_list_adapter.dump_python(
+            _session_list_adapter.validate_python(sessions, from_attributes=True),
+            mode="json",
+        ),
         "total": total,
         "page": page,
         "page_size": page_size
-    }
+    })
 
 
-@router.get("/sessions/{session_id}", response_model=SessionResponse)
+@router.get("/sessions/{session_id}")
 async def get_session(
     session_id: UUID,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get details of a specific learning session."""
-    session = db.query(LearningSession).filter(
+    session = db.query(LearningSession).options(
+        selectinload(LearningSession.video_recordings)
+    ).filter(
         LearningSession.session_id == session_id,
         LearningSession.user_id == current_user.id
     ).first()
@@ -131,10 +230,10 @@ async def get_session(
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    return session
+    return ORJSONResponse(_session_json(session))
 
 
-@router.post("/sessions/{session_id}/end", response_model=SessionResponse)
+@router.post("/sessions/{session_id}/end")
 async def end_session(
     session_id: UUID,
     session_update: SessionUpdate,
@@ -146,7 +245,9 @@ async def end_session(
     
     - **status**: Final status (completed, cancelled, etc.)
     """
-    session = db.query(LearningSession).filter(
+    session = db.query(LearningSession).options(
+        selectinload(LearningSession.video_recordings)
+    ).filter(
         LearningSession.session_id == session_id,
         LearningSession.user_id == current_user.id
     ).first()
@@ -181,12 +282,12 @@ async def end_session(
     if session_id_str in session_data:
         del session_data[session_id_str]
     
-    print(f"✅ Session ended: {session_id}")
-    print(f"   Duration: {session.duration_seconds}s")
-    print(f"   Final score: {session.final_score}")
-    print(f"   Focus: {session.focus_percentage}%")
+    logger.info(
+        "✅ Session ended: %s (duration=%ss, final_score=%s, focus=%s%%)",
+        session_id, session.duration_seconds, session.final_score, session.focus_percentage
+    )
     
-    return session
+    return ORJSONResponse(_session_json(session))
 
 
 @router.delete("/sessions/{session_id}", status_code=204)
@@ -196,7 +297,9 @@ async def delete_session(
     db: Session = Depends(get_db)
 ):
     """Delete a learning session."""
-    session = db.query(LearningSession).filter(
+    session = db.query(LearningSession).options(
+        selectinload(LearningSession.video_recordings)
+    ).filter(
         LearningSession.session_id == session_id,
         LearningSession.user_id == current_user.id
     ).first()
@@ -207,7 +310,10 @@ async def delete_session(
     db.delete(session)
     db.commit()
     
-    print(f"✅ Session deleted: {session_id}")
+    # Invalidate the cached ownership entry for this session
+    get_cache_service().delete(f"session_owner:{session_id}")
+    
+    logger.info("✅ Session deleted: %s", session_id)
     
     return None
 
@@ -225,7 +331,14 @@ async def websocket_endpoint(
     WebSocket endpoint for real-time AI focus detection.
     
     Receives video frames and sends back detection results with session stats.
-    
+
+    Protocol:
+    - Client sends raw JPEG bytes as binary WebSocket frames
+    - Text frames are reserved for JSON control messages (ping/pong)
+    - Each response carries performance.target_interval_ms; the client
+      should wait that long before capturing its next frame (adaptive
+      frame rate). The server still drops frames if the client overshoots.
+
     Features:
     - Real-time frame processing
     - Dynamic score calculation
@@ -256,11 +369,11 @@ async def websocket_endpoint(
         await websocket.close(code=1008, reason="Session not found")
         return
     
-    # Load AI service
+    # Spin up the inference pool (workers load the model via the initializer)
     try:
-        focus_service = get_focus_service()
-    except Exception as e: 
-        print(f"❌ Failed to load AI service: {e}")
+        _get_inference_executor()
+    except Exception as e:
+        logger.error("❌ Failed to start inference workers: %s", e)
         await websocket.close(code=1011, reason="AI service unavailable")
         return
     
@@ -272,116 +385,292 @@ async def websocket_endpoint(
             video_service = get_video_recording_service()
             # Note: Recording will be started via separate API endpoint
             # This just enables frame writing during detection
-            print(f"🎥 Video recording enabled for session {session_id}")
+            logger.info("🎥 Video recording enabled for session %s", session_id)
         except Exception as e:
-            print(f"⚠️ Failed to initialize video recording: {e}")
+            logger.warning("⚠️ Failed to initialize video recording: %s", e)
     
-    # Initialize session tracking
+    # Initialize session tracking; counters are mirrored from the DB row
+    # and accumulated in memory, then flushed periodically in one UPDATE
     if session_id not in session_data:
-        session_data[session_id] = {
-            "total_frames": 0,
-            "focused_frames": 0,
-            "last_score": float(session.initial_score),
-            "consecutive_violations": 0,  # Track consecutive violations for escalating alerts
-            "recording_enabled": enable_recording,
-        }
+        session_data[session_id] = SessionState(
+            last_score=float(session.initial_score),
+            recording_enabled=enable_recording,
+            total_violations=session.total_violations or 0,
+            phone_detected_count=session.phone_detected_count or 0,
+            left_seat_count=session.left_seat_count or 0,
+            total_alerts=session.total_alerts or 0,
+            gentle_alerts=session.gentle_alerts or 0,
+            urgent_alerts=session.urgent_alerts or 0,
+            focus_percentage=float(session.focus_percentage or 100.0),
+            duration_seconds=session.duration_seconds or 0,
+        )
+    sd = session_data[session_id]
     
     # ✅ Initialize processing state
-    session_processing[session_id] = {
-        "is_processing": False,
-        "frames_dropped": 0,
-        "total_processing_time": 0.0,
-        "max_processing_time": 0.0,
-        "frames_processed": 0
-    }
-    
-    print(f"🔌 WebSocket connected for session {session_id}")
-    print(f"⚡ Performance mode: Adaptive frame rate with queue prevention")
-    
-    # Batch database commits counter
-    frame_count = 0
-    commit_interval = 5  # Commit every 5 frames
-    
-    try:
+    session_processing[session_id] = ProcessingState()
+
+    logger.info("🔌 WebSocket connected for session %s", session_id)
+
+    # Counter values as of the last successful flush — the flush writes only
+    # the delta as "col = col + :d" so concurrent workers can't clobber
+    _counter_keys = (
+        "total_violations", "phone_detected_count", "left_seat_count",
+        "total_alerts", "gentle_alerts", "urgent_alerts",
+    )
+    flushed = {key: getattr(sd, key) for key in _counter_keys}
+
+    def _flush_session_stats():
+        """Persist the in-memory counters with one delta-based Core UPDATE"""
+        deltas = {key: getattr(sd, key) - flushed[key] for key in _counter_keys}
+        try:
+            db.execute(
+                update(LearningSession)
+                .where(LearningSession.session_id == session_uuid)
+                .values(
+                    current_score=sd.last_score,
+                    total_violations=LearningSession.total_violations + deltas["total_violations"],
+                    phone_detected_count=LearningSession.phone_detected_count + deltas["phone_detected_count"],
+                    left_seat_count=LearningSession.left_seat_count + deltas["left_seat_count"],
+                    total_alerts=LearningSession.total_alerts + deltas["total_alerts"],
+                    gentle_alerts=LearningSession.gentle_alerts + deltas["gentle_alerts"],
+                    urgent_alerts=LearningSession.urgent_alerts + deltas["urgent_alerts"],
+                    focus_percentage=sd.focus_percentage,
+                    duration_seconds=sd.duration_seconds,
+                    updated_at=now_utc(),
+                )
+            )
+            db.commit()
+            for key in _counter_keys:
+                flushed[key] += deltas[key]
+        except Exception as e:
+            logger.error("❌ Failed to flush session stats: %s", e)
+            db.rollback()
+
+    async def _periodic_flush(interval: float = 2.0):
+        """Background flush so the hot loop never touches the ORM"""
         while True:
-            # Receive data from client
-            data = await websocket.receive_text()
-            
-            # ✅ Handle keepalive ping
-            try:
-                message = json.loads(data)
-                if message.get("type") == "ping":
-                    await websocket.send_json({"type": "pong", "timestamp": now_utc().isoformat()})
+            await asyncio.sleep(interval)
+            _flush_session_stats()
+
+    flush_task = asyncio.create_task(_periodic_flush())
+
+    # ✅ 1-slot frame queue: a full queue means inference is still busy,
+    # so the receiver drops the frame (replaces the is_processing flag)
+    frame_q: asyncio.Queue = asyncio.Queue(maxsize=1)
+
+
+    async def _receive_frames():
+        """Receive loop: binary frames go to the queue, text is control JSON"""
+        try:
+            while True:
+                msg = await websocket.receive()
+
+                if msg.get("type") == "websocket.disconnect":
+                    raise WebSocketDisconnect(msg.get("code", 1000))
+
+                # ✅ Control channel (ping/pong) stays on text frames
+                if msg.get("text") is not None:
+                    try:
+                        message = orjson.loads(msg["text"])
+                        if message.get("type") == "ping":
+                            await websocket.send_json({"type": "pong", "timestamp": now_utc().isoformat()})
+                    except ValueError:
+                        pass  # Unknown text message, ignore
                     continue
-            except json.JSONDecodeError:
-                pass  # Not JSON, treat as frame data
-            
-            # ✅ Check if currently processing (drop frame if busy)
-            if session_processing[session_id]["is_processing"]:
-                session_processing[session_id]["frames_dropped"] += 1
-                # Silently drop frame to prevent queue buildup
-                continue
-            
-            # ✅ Mark as processing to prevent queue buildup
-            session_processing[session_id]["is_processing"] = True
-            processing_start_time = time.time()
-            
-            # ✅ Decode frame
+
+                # ✅ Frames arrive as raw JPEG bytes (no base64 overhead)
+                frame_data = msg.get("bytes")
+                if not frame_data:
+                    continue
+
+                # ✅ Enqueue; drop frame if inference hasn't caught up
+                try:
+                    frame_q.put_nowait(frame_data)
+                except asyncio.QueueFull:
+                    session_processing[session_id].frames_dropped += 1
+        except WebSocketDisconnect:
+            # Wake the processing loop with a sentinel
+            if frame_q.full():
+                frame_q.get_nowait()
+            frame_q.put_nowait(None)
+
+    receiver_task = asyncio.create_task(_receive_frames())
+
+    # ✅ Recording writes leave the event loop: the frame loop only enqueues,
+    # a writer task drains the queue through a worker thread so VideoWriter's
+    # blocking encode never stalls other sessions
+    writer_q: asyncio.Queue = asyncio.Queue(maxsize=30)
+
+    async def _drain_recording_writes():
+        while True:
+            frame = await writer_q.get()
             try:
-                if ',' in data:
-                    # Data URL format:  data:image/jpeg;base64,<base64data>
-                    frame_data = base64.b64decode(data.split(',')[1])
-                else: 
-                    frame_data = base64.b64decode(data)
+                await asyncio.to_thread(video_service.write_frame, session_id, frame)
             except Exception as e:
+                logger.warning("⚠️ Failed to write frame to recording: %s", e)
+
+    writer_task = asyncio.create_task(_drain_recording_writes()) if video_service else None
+
+    # ✅ Invariant per session: session.started_at never changes mid-stream
+    started_aware = make_aware(session.started_at)
+
+    # ✅ Response skeleton allocated once; the loop only overwrites the
+    # fields that change, instead of building a 25-key nested dict per frame
+    session_id_str = str(session.session_id)
+    proc = session_processing[session_id]
+    response = {
+        "session_id": session_id_str,
+        "timestamp": None,
+        # Detection results
+        "is_focused": False,
+        "person_detected": False,
+        "person_confidence": 0.0,
+        "phone_detected": False,
+        "confidence": 0.0,
+        # Alert
+        "message": "",
+        "alert_type": None,
+        # Additional info
+        "violation_type": None,
+        "consecutive_violations": 0,
+        # Recording status
+        "recording": {
+            "enabled": enable_recording,
+            "active": False,
+        },
+        # ✅ Performance metrics
+        "performance": {
+            "processing_time_ms": 0.0,
+            "avg_processing_time_ms": 0,
+            "target_interval_ms": 33,
+            "frames_dropped": 0,
+            "frames_processed": 0,
+        },
+        # Stats
+        "stats": {
+            "session_id": session_id_str,
+            "duration_seconds": 0,
+            "current_score": 0.0,
+            "total_violations": 0,
+            "phone_detected_count": 0,
+            "left_seat_count": 0,
+            "total_alerts": 0,
+            "gentle_alerts": 0,
+            "urgent_alerts": 0,
+            "focus_percentage": 100.0,
+            "total_frames": 0,
+            "focused_frames": 0,
+        },
+    }
+    resp_recording = response["recording"]
+    resp_perf = response["performance"]
+    resp_stats = response["stats"]
+
+    try:
+        while True:
+            # Next frame from the receiver task
+            frame_data = await frame_q.get()
+
+            if frame_data is None:
+                raise WebSocketDisconnect()
+
+            processing_start_time = time.time()
+
+            # ✅ One datetime per frame, reused by every branch below
+            current_time = now_utc()
+            ts_iso = current_time.isoformat()
+
+            # ✅ Decode JPEG once; recording and inference share the ndarray
+            recording_now = video_service is not None and video_service.is_recording(session_id)
+            nparr = np.frombuffer(frame_data, np.uint8)
+            if recording_now:
+                # Full resolution for the recording file
+                frame_img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+            else:
+                # Half resolution at decode time — the detector runs at <=640px anyway
+                frame_img = cv2.imdecode(nparr, cv2.IMREAD_REDUCED_COLOR_2)
+
+            if frame_img is None:
                 await websocket.send_json({
-                    "error": f"Failed to decode frame: {str(e)}",
-                    "timestamp": now_utc().isoformat()
+                    "error": "Failed to decode frame",
+                    "timestamp": ts_iso
                 })
-                session_processing[session_id]["is_processing"] = False  # ✅ Reset on error
                 continue
-            
-            # ✅ Write frame to video recording if enabled
-            if video_service and video_service.is_recording(session_id):
+
+            # ✅ Queue frame for the recording writer task (drop if the
+            # encoder is behind rather than stalling detection). The frame
+            # is normalized to the recording resolution here, once — the
+            # writer thread writes it as-is, and the inference downscale
+            # below starts from the same ndarray
+            if recording_now:
+                rec_res = video_service.get_target_resolution(session_id)
+                if rec_res and (frame_img.shape[1] != rec_res[0] or frame_img.shape[0] != rec_res[1]):
+                    frame_img = cv2.resize(frame_img, rec_res, interpolation=cv2.INTER_AREA)
                 try:
-                    # Decode frame data to numpy array for recording
-                    nparr = np.frombuffer(frame_data, np.uint8)
-                    frame_img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-                    
-                    if frame_img is not None:
-                        video_service.write_frame(session_id, frame_img)
-                        recording_active = True
+                    writer_q.put_nowait(frame_img)
+                    recording_active = True
+                except asyncio.QueueFull:
+                    pass
+
+            # ✅ Downscale to inference resolution before crossing into the
+            # worker — shrinks pickling, decode and every conv layer downstream
+            if frame_img.shape[1] > INFER_W:
+                infer_img = cv2.resize(frame_img, (INFER_W, INFER_H), interpolation=cv2.INTER_AREA)
+            else:
+                infer_img = frame_img
+
+            # ✅ Motion gate: hashing a thumbnail costs microseconds, a model
+            # pass costs milliseconds — identical frames reuse the last result
+            thumb = cv2.resize(
+                cv2.cvtColor(infer_img, cv2.COLOR_BGR2GRAY),
+                (32, 18), interpolation=cv2.INTER_AREA
+            )
+            last_thumb = sd.last_thumb
+            sd.last_thumb = thumb
+
+            if (
+                last_thumb is not None
+                and sd.last_result is not None
+                and cv2.absdiff(thumb, last_thumb).mean() < MOTION_DIFF_THRESHOLD
+            ):
+                # No motion since last frame: skip inference entirely
+                result = dict(sd.last_result)
+            else:
+                # ✅ Run AI detection in the shared process pool; the awaited
+                # call plus the 1-slot queue keeps one frame in flight per session
+                try:
+                    result = await asyncio.get_running_loop().run_in_executor(
+                        _get_inference_executor(), run_inference_worker, infer_img
+                    )
                 except Exception as e:
-                    print(f"⚠️ Failed to write frame to recording: {e}")
-            
-            # ✅ Run AI detection
-            try:
-                result, _ = focus_service.process_webcam_frame(frame_data)
-            except Exception as e:
-                print(f"❌ AI detection error: {e}")
-                await websocket.send_json({
-                    "error": f"Detection failed: {str(e)}",
-                    "timestamp": now_utc().isoformat()
-                })
-                session_processing[session_id]["is_processing"] = False  # ✅ Reset on error
-                continue
+                    logger.error("❌ AI detection error: %s", e)
+                    await websocket.send_json({
+                        "error": f"Detection failed: {str(e)}",
+                        "timestamp": ts_iso
+                    })
+                    continue
+                # The loop mutates message/alert_type below, so keep a clean copy
+                sd.last_result = dict(result)
             
             # ✅ Track processing time
             processing_time = time.time() - processing_start_time
-            session_processing[session_id]["frames_processed"] += 1
-            session_processing[session_id]["total_processing_time"] += processing_time
-            session_processing[session_id]["max_processing_time"] = max(
-                session_processing[session_id]["max_processing_time"],
+            proc.frames_processed += 1
+            proc.total_processing_time += processing_time
+            if proc.processing_ema > 0:
+                proc.processing_ema = 0.9 * proc.processing_ema + 0.1 * processing_time
+            else:
+                proc.processing_ema = processing_time
+            proc.max_processing_time = max(
+                proc.max_processing_time,
                 processing_time
             )
             
             # ✅ Update frame counters
-            session_data[session_id]["total_frames"] += 1
-            frame_count += 1
+            sd.total_frames += 1
             
             is_focused = result.get("is_focused", False)
             if is_focused:
-                session_data[session_id]["focused_frames"] += 1
+                sd.focused_frames += 1
             
             # ✅ Extract metrics
             metrics = result.get("metrics", {})
@@ -395,52 +684,52 @@ async def websocket_endpoint(
             
             # Phone detection
             if phone_detected:
-                session.phone_detected_count += 1
-                session.total_violations += 1
+                sd.phone_detected_count += 1
+                sd.total_violations += 1
                 violation_occurred = True
                 violation_type = "phone"
                 
                 # Override alert message
-                result["message"] = "📱 Điện thoại phát hiện!  Hãy tập trung vào học tập."
+                result["message"] = MSG_PHONE_DETECTED
                 result["alert_type"] = "urgent"
             
             # Person detection - check for leaving seat
             # Consider left seat if:  no person OR very low confidence
             if not person_detected or person_confidence < 0.3:
-                session.left_seat_count += 1
-                session.total_violations += 1
+                sd.left_seat_count += 1
+                sd.total_violations += 1
                 violation_occurred = True
                 violation_type = "left_seat"
                 
                 # Override alert message
                 if not person_detected:
-                    result["message"] = "⚠️ Không phát hiện người!  Vui lòng quay lại ghế."
+                    result["message"] = MSG_NO_PERSON
                 else:
-                    result["message"] = "⚠️ Có vẻ bạn đang rời khỏi ghế. Hãy ngồi thẳng!"
+                    result["message"] = MSG_LEAVING_SEAT
                 result["alert_type"] = "urgent"
             
             # ✅ Track consecutive violations for escalating alerts
             if violation_occurred:
-                session_data[session_id]["consecutive_violations"] += 1
+                sd.consecutive_violations += 1
                 
                 # Escalate alert if too many consecutive violations
-                if session_data[session_id]["consecutive_violations"] >= 3:
+                if sd.consecutive_violations >= 3:
                     result["alert_type"] = "critical"
-                    result["message"] = "🚨 CẢNH BÁO:  Nhiều vi phạm liên tiếp!  Hãy tập trung!"
+                    result["message"] = MSG_CONSECUTIVE_VIOLATIONS
             else:
-                session_data[session_id]["consecutive_violations"] = 0
+                sd.consecutive_violations = 0
             
             # ✅ Update alerts
             alert_type = result.get("alert_type")
             if alert_type:
-                session.total_alerts += 1
+                sd.total_alerts += 1
                 if alert_type == "gentle":
-                    session.gentle_alerts += 1
+                    sd.gentle_alerts += 1
                 elif alert_type == "urgent":
-                    session.urgent_alerts += 1
+                    sd.urgent_alerts += 1
             
             # ✅ Calculate dynamic score
-            current_score = session_data[session_id]["last_score"]
+            current_score = sd.last_score
             
             if violation_occurred:
                 # Decrease score based on violation severity
@@ -451,131 +740,103 @@ async def websocket_endpoint(
                 if is_focused:
                     current_score = min(100.0, current_score + 0.15)
             
-            session_data[session_id]["last_score"] = current_score
-            session.current_score = current_score
+            sd.last_score = current_score
             
             # ✅ Calculate focus percentage
-            total_frames = session_data[session_id]["total_frames"]
-            focused_frames = session_data[session_id]["focused_frames"]
+            total_frames = sd.total_frames
+            focused_frames = sd.focused_frames
             focus_percentage = (focused_frames / total_frames * 100) if total_frames > 0 else 100.0
-            session.focus_percentage = focus_percentage
-            
-            # ✅ Calculate duration safely (handle timezone)
-            current_time = now_utc()
-            started_at = make_aware(session.started_at)
-            duration_seconds = calculate_duration(started_at, current_time)
-            session.duration_seconds = duration_seconds
-            
-            # ✅ Update timestamp
-            session.updated_at = current_time
-            
-            # ✅ Batch commit to database (every N frames)
-            if frame_count % commit_interval == 0:
-                try:
-                    db.commit()
-                except Exception as e:
-                    print(f"❌ Failed to commit session update: {e}")
-                    db.rollback()
-            
-            # ✅ Prepare response
-            response = {
-                "session_id": str(session.session_id),
-                "timestamp": current_time.isoformat(),
-                
-                # Detection results
-                "is_focused":  is_focused,
-                "person_detected": person_detected,
-                "person_confidence": round(person_confidence, 2),
-                "phone_detected":  phone_detected,
-                "confidence": round(result.get("confidence", 0.0), 2),
-                
-                # Alert
-                "message": result.get("message", ""),
-                "alert_type": alert_type,
-                
-                # Additional info
-                "violation_type": violation_type,
-                "consecutive_violations": session_data[session_id]["consecutive_violations"],
-                
-                # Recording status
-                "recording": {
-                    "enabled": enable_recording,
-                    "active": recording_active,
-                },
-                
-                # ✅ Performance metrics
-                "performance": {
-                    "processing_time_ms": round(processing_time * 1000, 1),
-                    "avg_processing_time_ms": round(
-                        (session_processing[session_id]["total_processing_time"] / 
-                         session_processing[session_id]["frames_processed"]) * 1000, 1
-                    ) if session_processing[session_id]["frames_processed"] > 0 else 0,
-                    "frames_dropped": session_processing[session_id]["frames_dropped"],
-                    "frames_processed": session_processing[session_id]["frames_processed"]
-                },
-                
-                # Stats
-                "stats":  {
-                    "session_id": str(session.session_id),
-                    "duration_seconds": duration_seconds,
-                    "current_score": round(current_score, 1),
-                    "total_violations": session.total_violations,
-                    "phone_detected_count": session.phone_detected_count,
-                    "left_seat_count":  session.left_seat_count,
-                    "total_alerts":  session.total_alerts,
-                    "gentle_alerts": session.gentle_alerts,
-                    "urgent_alerts": session.urgent_alerts,
-                    "focus_percentage": round(focus_percentage, 1),
-                    "total_frames": total_frames,
-                    "focused_frames": focused_frames,
-                }
-            }
+            sd.focus_percentage = focus_percentage
             
+            # ✅ Calculate duration safely (timezone handled once before the loop)
+            duration_seconds = calculate_duration(started_aware, current_time)
+            sd.duration_seconds = duration_seconds
+
+            # ✅ Fill the prebuilt response skeleton
+            response["timestamp"] = ts_iso
+
+            # Detection results
+            response["is_focused"] = is_focused
+            response["person_detected"] = person_detected
+            response["person_confidence"] = round(person_confidence, 2)
+            response["phone_detected"] = phone_detected
+            response["confidence"] = round(result.get("confidence", 0.0), 2)
+
+            # Alert
+            response["message"] = result.get("message", "")
+            response["alert_type"] = alert_type
+
+            # Additional info
+            response["violation_type"] = violation_type
+            response["consecutive_violations"] = sd.consecutive_violations
+
+            # Recording status
+            resp_recording["active"] = recording_active
+
+            # ✅ Performance metrics
+            resp_perf["processing_time_ms"] = round(processing_time * 1000, 1)
+            resp_perf["avg_processing_time_ms"] = round(
+                (proc.total_processing_time / proc.frames_processed) * 1000, 1
+            ) if proc.frames_processed > 0 else 0
+            # ✅ Pacing hint: ask the client to match our actual throughput
+            # (10% headroom, floor at ~30 FPS) instead of blind-sending frames
+            resp_perf["target_interval_ms"] = int(max(33, proc.processing_ema * 1000 * 1.1))
+            resp_perf["frames_dropped"] = proc.frames_dropped
+            resp_perf["frames_processed"] = proc.frames_processed
+
+            # Stats
+            resp_stats["duration_seconds"] = duration_seconds
+            resp_stats["current_score"] = round(current_score, 1)
+            resp_stats["total_violations"] = sd.total_violations
+            resp_stats["phone_detected_count"] = sd.phone_detected_count
+            resp_stats["left_seat_count"] = sd.left_seat_count
+            resp_stats["total_alerts"] = sd.total_alerts
+            resp_stats["gentle_alerts"] = sd.gentle_alerts
+            resp_stats["urgent_alerts"] = sd.urgent_alerts
+            resp_stats["focus_percentage"] = round(focus_percentage, 1)
+            resp_stats["total_frames"] = total_frames
+            resp_stats["focused_frames"] = focused_frames
+
             # ✅ Log slow processing
             if processing_time > 1.0:
-                print(f"⚠️ Slow frame processing: {processing_time:.2f}s")
-            
-            # ✅ Send response immediately
-            await websocket.send_json(response)
+                logger.warning("⚠️ Slow frame processing: %.2fs", processing_time)
             
-            # ✅ Mark processing complete (allow next frame)
-            session_processing[session_id]["is_processing"] = False
-    
+            # ✅ Send response immediately (orjson serializes in C)
+            await websocket.send_text(orjson.dumps(response).decode())
+
     except WebSocketDisconnect:
-        print(f"🔌 WebSocket disconnected for session {session_id}")
+        logger.info("🔌 WebSocket disconnected for session %s", session_id)
         
-        # Final commit before cleanup
-        try:
-            db.commit()
-            print(f"✅ Final state saved for session {session_id}")
-        except Exception as e:
-            print(f"❌ Failed to save final state: {e}")
-            db.rollback()
+        # Final flush before cleanup
+        _flush_session_stats()
+        logger.info("✅ Final state saved for session %s", session_id)
         
         # Cleanup session data
         if session_id in session_data:
             final_stats = session_data[session_id]
-            print(f"📊 Session {session_id} stats:")
-            print(f"   Total frames: {final_stats['total_frames']}")
-            print(f"   Focused frames:  {final_stats['focused_frames']}")
-            print(f"   Final score: {final_stats['last_score']:.1f}")
+            logger.info(
+                "📊 Session %s stats: total_frames=%s focused_frames=%s final_score=%.1f",
+                session_id, final_stats.total_frames, final_stats.focused_frames,
+                final_stats.last_score
+            )
             del session_data[session_id]
         
         # ✅ Cleanup and log performance
         if session_id in session_processing:
             perf = session_processing[session_id]
-            if perf["frames_processed"] > 0:
-                avg_time = perf["total_processing_time"] / perf["frames_processed"]
-                print(f"⚡ Performance metrics for session {session_id}:")
-                print(f"   Frames processed: {perf['frames_processed']}")
-                print(f"   Frames dropped: {perf['frames_dropped']}")
-                print(f"   Drop rate: {(perf['frames_dropped']/(perf['frames_processed']+perf['frames_dropped'])*100):.1f}%")
-                print(f"   Avg processing time: {avg_time:.3f}s ({1/avg_time:.2f} FPS)")
-                print(f"   Max processing time: {perf['max_processing_time']:.3f}s")
+            if perf.frames_processed > 0:
+                avg_time = perf.total_processing_time / perf.frames_processed
+                logger.info(
+                    "⚡ Session %s perf: processed=%s dropped=%s drop_rate=%.1f%% "
+                    "avg=%.3fs (%.2f FPS) max=%.3fs",
+                    session_id, perf.frames_processed, perf.frames_dropped,
+                    perf.frames_dropped / (perf.frames_processed + perf.frames_dropped) * 100,
+                    avg_time, 1 / avg_time, perf.max_processing_time
+                )
             del session_processing[session_id]
     
     except Exception as e:
-        print(f"❌ WebSocket error: {e}")
+        logger.error("❌ WebSocket error: %s", e)
         import traceback
         traceback.print_exc()
         
@@ -594,16 +855,19 @@ async def websocket_endpoint(
         except:
             pass
         
-        # Final commit attempt
-        try:
-            db.commit()
-        except: 
-            db.rollback()
+        # Final flush attempt
+        _flush_session_stats()
         
         # Cleanup session data
-        if session_id in session_data: 
+        if session_id in session_data:
             del session_data[session_id]
-        
+
         # ✅ Cleanup processing state
         if session_id in session_processing:
-            del session_processing[session_id]
\ No newline at end of file
+            del session_processing[session_id]
+
+    finally:
+        receiver_task.cancel()
+        flush_task.cancel()
+        if writer_task:
+            writer_task.cancel()
\ No newline at end of file
@@ -2,19 +2,29 @@
 Video Recording Router - API endpoints for video recording management
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Response
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, func, select
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from uuid import UUID
 from pathlib import Path
+from email.utils import formatdate
+import hashlib
+import os
+import json
 import logging
 
+import aiofiles
+from fastapi.responses import ORJSONResponse
+
 from app.database import get_db
 from app.models.user import User
 from app.models.learning_session import LearningSession
 from app.models.video_recording import VideoRecording
 from app.dependencies import get_current_user
+from app.schemas.recording import VideoRecordingRead
+from app.services.cache import get_cache_service
 from app.services.video_recording_service import get_video_recording_service
 from utils.datetime_utils import now_utc
 
@@ -22,6 +32,144 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/recordings", tags=["Video Recordings"])
 
+# Ownership cache TTL (seconds)
+SESSION_OWNER_TTL = 300
+
+# Serialized-metadata cache TTL for finished (immutable) recordings
+RECORDING_CACHE_TTL = 3600
+
+
+def _recording_etag(recording: VideoRecording) -> str:
+    """Weak version tag for conditional GETs on finished recordings"""
+    return hashlib.md5(f"{recording.updated_at}:{recording.is_active}".encode()).hexdigest()
+
+
+def _cache_recording(recording: VideoRecording, owner_id: UUID) -> dict:
+    """Serialize a finished recording and cache it together with its owner"""
+    data = VideoRecordingRead.model_validate(recording).model_dump(mode="json")
+    get_cache_service().setex(
+        f"rec:{recording.recording_id}",
+        RECORDING_CACHE_TTL,
+        json.dumps({
+            "owner": str(owner_id),
+            "etag": _recording_etag(recording),
+            "data": data
+        })
+    )
+    return data
+
+# Streaming chunk size for video downloads (bytes)
+DOWNLOAD_CHUNK_SIZE = 1_000_000
+
+# Scalar projection for listing endpoints: skips ORM entity construction,
+# identity-map bookkeeping and any relationship machinery per row
+_LISTING_COLS = (
+    VideoRecording.recording_id,
+    VideoRecording.session_id,
+    VideoRecording.filename,
+    VideoRecording.filepath,
+    VideoRecording.file_size_bytes,
+    VideoRecording.fps,
+    VideoRecording.resolution_width,
+    VideoRecording.resolution_height,
+    VideoRecording.codec,
+    VideoRecording.duration_seconds,
+    VideoRecording.frame_count,
+    VideoRecording.is_active,
+    VideoRecording.started_at,
+    VideoRecording.ended_at,
+    VideoRecording.created_at,
+    VideoRecording.cloud_storage_url,
+    VideoRecording.cloud_storage_provider,
+)
+
+
+def _parse_range_header(range_header: str, file_size: int) -> tuple:
+    """
+    Parse a "bytes=start-end" Range header into (start, end) offsets.
+
+    Raises 416 for malformed or unsatisfiable ranges.
+    """
+    try:
+        unit, _, ranges = range_header.partition("=")
+        if unit.strip() != "bytes":
+            raise ValueError("unsupported range unit")
+        start_s, _, end_s = ranges.strip().partition("-")
+        if not start_s:
+            # RFC 7233 suffix range "bytes=-N": the last N bytes
+            suffix = int(end_s) if end_s else 0
+            if suffix <= 0:
+                raise ValueError("empty suffix range")
+            start = max(0, file_size - suffix)
+            end = file_size - 1
+        else:
+            start = int(start_s)
+            end = int(end_s) if end_s else file_size - 1
+    except ValueError:
+        raise HTTPException(status_code=416, detail="Invalid range header")
+
+    if start > end or start >= file_size:
+        raise HTTPException(status_code=416, detail="Range not satisfiable")
+
+    return start, min(end, file_size - 1)
+
+
+async def _iter_file_range(path: Path, start: int, end: int):
+    """Yield bounded chunks of a file between byte offsets [start, end]
+
+    Fully async so a slow disk or client never blocks the event loop.
+    """
+    async with aiofiles.open(path, "rb") as f:
+        await f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await f.read(min(DOWNLOAD_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _verify_session_owner(db: Session, session_id: UUID, user_id: UUID) -> bool:
+    """
+    Check that a session exists and belongs to the user.
+
+    Repeated checks are served from the cache (session_owner:{session_id}
+    -> user_id) so the per-call authorization query skips Postgres.
+    """
+    cache = get_cache_service()
+    key = f"session_owner:{session_id}"
+
+    cached = cache.get(key)
+    if cached is not None:
+        return cached == str(user_id)
+
+    row = db.query(LearningSession.user_id).filter(
+        LearningSession.session_id == session_id
+    ).first()
+
+    if not row:
+        return False
+
+    cache.setex(key, SESSION_OWNER_TTL, str(row.user_id))
+    return row.user_id == user_id
+
+
+def _session_with_active_recording(db: Session, session_id: UUID):
+    """
+    Fetch session owner and any active recording in a single round trip.
+
+    Returns (owner_user_id, active_recording_or_None), or None when the
+    session does not exist.
+    """
+    return db.query(LearningSession.user_id, VideoRecording).outerjoin(
+        VideoRecording,
+        and_(
+            VideoRecording.session_id == LearningSession.session_id,
+            VideoRecording.is_active == True
+        )
+    ).filter(LearningSession.session_id == session_id).first()
+
 
 @router.post("/sessions/{session_id}/start")
 async def start_recording(
@@ -40,22 +188,15 @@ async def start_recording(
     - **resolution**: Video resolution (default: 1920x1080)
     - **codec**: Video codec (default: mp4v)
     """
-    # Verify session exists and belongs to user
-    session = db.query(LearningSession).filter(
-        LearningSession.session_id == session_id,
-        LearningSession.user_id == current_user.id
-    ).first()
+    # ✅ Ownership + active-recording state in one round trip
+    row = _session_with_active_recording(db, session_id)
     
-    if not session:
+    if not row or row[0] != current_user.id:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    # Check if already recording
-    existing = db.query(VideoRecording).filter(
-        VideoRecording.session_id == session_id,
-        VideoRecording.is_active == True
-    ).first()
+    get_cache_service().setex(f"session_owner:{session_id}", SESSION_OWNER_TTL, str(row[0]))
     
-    if existing:
+    if row[1] is not None:
         raise HTTPException(status_code=400, detail="Recording already active for this session")
     
     # Parse resolution
@@ -108,7 +249,7 @@ async def start_recording(
     }
 
 
-@router.post("/sessions/{session_id}/stop")
+@router.post("/sessions/{session_id}/stop", response_model=VideoRecordingRead)
 async def stop_recording(
     session_id: UUID,
     current_user: User = Depends(get_current_user),
@@ -119,20 +260,15 @@ async def stop_recording(
     
     - **session_id**: Learning session UUID
     """
-    # Verify session exists and belongs to user
-    session = db.query(LearningSession).filter(
-        LearningSession.session_id == session_id,
-        LearningSession.user_id == current_user.id
-    ).first()
+    # ✅ Ownership + active-recording state in one round trip
+    row = _session_with_active_recording(db, session_id)
     
-    if not session:
+    if not row or row[0] != current_user.id:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    # Get active recording
-    recording = db.query(VideoRecording).filter(
-        VideoRecording.session_id == session_id,
-        VideoRecording.is_active == True
-    ).first()
+    get_cache_service().setex(f"session_owner:{session_id}", SESSION_OWNER_TTL, str(row[0]))
+    
+    recording = row[1]
     
     if not recording:
         raise HTTPException(status_code=404, detail="No active recording for this session")
@@ -155,40 +291,59 @@ async def stop_recording(
     db.commit()
     db.refresh(recording)
     
+    # ✅ The recording just became immutable — prime the metadata cache
+    _cache_recording(recording, current_user.id)
+    
     logger.info(f"Stopped recording for session {session_id}: {recording.filename}")
     
-    return recording.to_dict()
+    return recording
 
 
 @router.get("/sessions/{session_id}")
 async def list_session_recordings(
     session_id: UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=200)
 ):
     """
-    List all recordings for a learning session.
+    List recordings for a learning session (paginated).
     
     - **session_id**: Learning session UUID
+    - **page**: Page number (default: 1)
+    - **page_size**: Items per page (default: 50, max: 200)
     """
-    # Verify session exists and belongs to user
-    session = db.query(LearningSession).filter(
-        LearningSession.session_id == session_id,
-        LearningSession.user_id == current_user.id
-    ).first()
-    
-    if not session:
+    # Verify session exists and belongs to user (cached)
+    if not _verify_session_owner(db, session_id, current_user.id):
         raise HTTPException(status_code=404, detail="Session not found")
     
-    # Get recordings
-    recordings = db.query(VideoRecording).filter(
+    # Scalar projection + server-side cursor: the driver streams rows in
+    # batches instead of buffering the whole result set client-side, so a
+    # session with thousands of recordings holds O(page_size) rows at most
+    offset = (page - 1) * page_size
+    query = db.query(
+        *_LISTING_COLS, func.count().over().label("total")
+    ).filter(
         VideoRecording.session_id == session_id
-    ).order_by(VideoRecording.started_at.desc()).all()
+    ).order_by(
+        VideoRecording.started_at.desc()
+    ).offset(offset).limit(page_size).execution_options(
+        stream_results=True, yield_per=100
+    )
+    
+    total = 0
+    recordings = []
+    for rec in query:
+        total = rec.total
+        recordings.append(VideoRecordingRead.model_validate(rec))
     
     return {
         "session_id": str(session_id),
-        "total": len(recordings),
-        "recordings": [rec.to_dict() for rec in recordings]
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "recordings": recordings
     }
 
 
@@ -205,79 +360,147 @@ async def list_all_recordings(
     - **page**: Page number (default: 1)
     - **page_size**: Items per page (default: 10, max: 100)
     """
-    # Query recordings through user's sessions
-    query = db.query(VideoRecording).join(LearningSession).filter(
+    # Query recordings through user's sessions; count() OVER() returns the
+    # unpaginated total inline, so one round trip covers count + page.
+    # Filtering via IN (subquery) keeps the plan on video_recordings alone
+    # instead of joining the wide learning_sessions rows into every page.
+    user_session_ids = select(LearningSession.session_id).where(
         LearningSession.user_id == current_user.id
     )
     
-    total = query.count()
-    
     offset = (page - 1) * page_size
-    recordings = query.order_by(
+    rows = db.query(
+        *_LISTING_COLS, func.count().over().label("total")
+    ).filter(
+        VideoRecording.session_id.in_(user_session_ids)
+    ).order_by(
         VideoRecording.started_at.desc()
     ).offset(offset).limit(page_size).all()
     
+    total = rows[0].total if rows else 0
+    recordings = rows
+    
     return {
         "total": total,
         "page": page,
         "page_size": page_size,
-        "recordings": [rec.to_dict() for rec in recordings]
+        "recordings": [VideoRecordingRead.model_validate(rec) for rec in recordings]
     }
 
 
 @router.get("/{recording_id}")
 async def get_recording(
     recording_id: UUID,
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Get details of a specific recording.
     
+    Finished recordings are immutable, so repeat reads come straight from
+    the cache instead of the ownership JOIN, and clients that already
+    hold the current ETag get an empty 304.
+    
     - **recording_id**: Recording UUID
     """
-    # Get recording and verify access
-    recording = db.query(VideoRecording).join(LearningSession).filter(
-        VideoRecording.recording_id == recording_id,
-        LearningSession.user_id == current_user.id
-    ).first()
+    # ✅ Cache hit: still enforce ownership against the cached owner id
+    cached = get_cache_service().get(f"rec:{recording_id}")
+    if cached is not None:
+        entry = json.loads(cached)
+        if entry["owner"] == str(current_user.id):
+            etag = entry.get("etag")
+            if etag and request.headers.get("if-none-match") == etag:
+                return Response(status_code=304)
+            return ORJSONResponse(entry["data"], headers={"ETag": etag} if etag else None)
+        raise HTTPException(status_code=404, detail="Recording not found")
+    
+    # Get recording and verify access (no relationship load — the session
+    # join exists purely for the ownership check)
+    recording = db.execute(
+        select(VideoRecording).join(LearningSession).where(
+            VideoRecording.recording_id == recording_id,
+            LearningSession.user_id == current_user.id
+        )
+    ).scalar_one_or_none()
     
     if not recording:
         raise HTTPException(status_code=404, detail="Recording not found")
     
-    return recording.to_dict()
+    # ✅ Conditional GET: short-circuit before any serialization work
+    etag = _recording_etag(recording)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304)
+    
+    data = VideoRecordingRead.model_validate(recording).model_dump(mode="json")
+    
+    # Only finished recordings are safe to cache — they never change again
+    if not recording.is_active:
+        _cache_recording(recording, current_user.id)
+    
+    return ORJSONResponse(data, headers={"ETag": etag})
 
 
 @router.get("/{recording_id}/download")
 async def download_recording(
     recording_id: UUID,
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
-    Download a recorded video file.
+    Download or stream a recorded video file.
+    
+    Honors HTTP Range requests (206 + Content-Range) so players can seek
+    and each connection holds at most one ~1 MB chunk in memory.
     
     - **recording_id**: Recording UUID
     """
-    # Get recording and verify access
-    recording = db.query(VideoRecording).join(LearningSession).filter(
-        VideoRecording.recording_id == recording_id,
-        LearningSession.user_id == current_user.id
+    # Only the two columns the download needs — no ORM entity, no
+    # identity-map bookkeeping on a pure streaming path
+    recording = db.execute(
+        select(VideoRecording.filepath, VideoRecording.filename)
+        .join(LearningSession).where(
+            VideoRecording.recording_id == recording_id,
+            LearningSession.user_id == current_user.id
+        )
     ).first()
     
     if not recording:
         raise HTTPException(status_code=404, detail="Recording not found")
     
-    # Check file exists
-    filepath = Path(recording.filepath)
-    if not filepath.exists():
+    # One stat() covers the existence check, Content-Length and
+    # Last-Modified — no separate exists() round trip to the filesystem
+    try:
+        st = os.stat(recording.filepath)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Video file not found")
     
-    # Return file
-    return FileResponse(
-        path=str(filepath),
-        filename=recording.filename,
-        media_type="video/mp4"
+    filepath = Path(recording.filepath)
+    file_size = st.st_size
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f'attachment; filename="{recording.filename}"',
+        "Last-Modified": formatdate(st.st_mtime, usegmt=True),
+    }
+    
+    range_header = request.headers.get("range")
+    if range_header:
+        start, end = _parse_range_header(range_header, file_size)
+        headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(
+            _iter_file_range(filepath, start, end),
+            status_code=206,
+            media_type="video/mp4",
+            headers=headers
+        )
+    
+    headers["Content-Length"] = str(file_size)
+    return StreamingResponse(
+        _iter_file_range(filepath, 0, file_size - 1),
+        media_type="video/mp4",
+        headers=headers
     )
 
 
@@ -293,10 +516,12 @@ async def delete_recording(
     - **recording_id**: Recording UUID
     """
     # Get recording and verify access
-    recording = db.query(VideoRecording).join(LearningSession).filter(
-        VideoRecording.recording_id == recording_id,
-        LearningSession.user_id == current_user.id
-    ).first()
+    recording = db.execute(
+        select(VideoRecording).join(LearningSession).where(
+            VideoRecording.recording_id == recording_id,
+            LearningSession.user_id == current_user.id
+        )
+    ).scalar_one_or_none()
     
     if not recording:
         raise HTTPException(status_code=404, detail="Recording not found")
@@ -309,6 +534,9 @@ async def delete_recording(
     db.delete(recording)
     db.commit()
     
+    # Invalidate cached metadata
+    get_cache_service().delete(f"rec:{recording_id}")
+    
     logger.info(f"Deleted recording {recording_id}: {recording.filename}")
     
     return {"message": "Recording deleted successfully", "recording_id": str(recording_id)}
@@ -317,32 +545,46 @@ async def delete_recording(
 @router.get("/{recording_id}/status")
 async def get_recording_status(
     recording_id: UUID,
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Get current status of an active recording.
     
+    Finished recordings answer conditional polls with 304, so status
+    pollers stop paying for JSON on every tick.
+    
     - **recording_id**: Recording UUID
     """
     # Get recording and verify access
-    recording = db.query(VideoRecording).join(LearningSession).filter(
-        VideoRecording.recording_id == recording_id,
-        LearningSession.user_id == current_user.id
-    ).first()
+    recording = db.execute(
+        select(VideoRecording).join(LearningSession).where(
+            VideoRecording.recording_id == recording_id,
+            LearningSession.user_id == current_user.id
+        )
+    ).scalar_one_or_none()
     
     if not recording:
         raise HTTPException(status_code=404, detail="Recording not found")
     
-    # If recording is active, get live stats
+    # If recording is active, get live stats (never conditional — the
+    # live counters change every frame)
     if recording.is_active:
         video_service = get_video_recording_service()
         live_info = video_service.get_recording_info(str(recording.session_id))
         
         if live_info:
             return {
-                **recording.to_dict(),
+                **VideoRecordingRead.model_validate(recording).model_dump(),
                 "live_stats": live_info
             }
     
-    return recording.to_dict()
+    etag = _recording_etag(recording)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304)
+    
+    return ORJSONResponse(
+        VideoRecordingRead.model_validate(recording).model_dump(mode="json"),
+        headers={"ETag": etag}
+    )
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 from typing import Optional
 from datetime import datetime
 from uuid import UUID
@@ -31,8 +31,11 @@ class SessionStats(BaseModel):
     total_frames: Optional[int] = 0
     focused_frames: Optional[int] = 0
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(
+        from_attributes=True,
+        ser_json_timedelta='float',
+        ser_json_bytes='base64',
+    )
 
 
 class DetectionResult(BaseModel):
@@ -85,8 +88,11 @@ class SessionResponse(BaseModel):
     # Focus metrics
     focus_percentage: float
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(
+        from_attributes=True,
+        ser_json_timedelta='float',
+        ser_json_bytes='base64',
+    )
 
 
 class SessionListResponse(BaseModel):
@@ -94,4 +100,11 @@ class SessionListResponse(BaseModel):
     sessions: list[SessionResponse]
     total: int
     page: int
-    page_size:  int
\ No newline at end of file
+    page_size:  int
+
+
+# Precomputed adapters, built once at import time. Hot listing/detail paths
+# reuse a single prepared validator + serializer instead of letting FastAPI
+# rebuild one per response.
+SESSION_ADAPTER = TypeAdapter(SessionResponse)
+SESSION_LIST_ADAPTER = TypeAdapter(list[SessionResponse])
\ No newline at end of file
@@ -0,0 +1,38 @@
+from pydantic import BaseModel, computed_field
+from typing import Optional
+from datetime import datetime
+from uuid import UUID
+
+
+class VideoRecordingRead(BaseModel):
+    """Serialized recording metadata (replaces VideoRecording.to_dict)"""
+    recording_id: UUID
+    session_id: UUID
+    filename: str
+    filepath: str
+    file_size_bytes: int = 0
+    fps: float = 30.0
+    resolution_width: int = 1920
+    resolution_height: int = 1080
+    codec: str = "mp4v"
+    duration_seconds: float = 0.0
+    frame_count: int = 0
+    is_active: bool = True
+    started_at: datetime
+    ended_at: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    cloud_storage_url: Optional[str] = None
+    cloud_storage_provider: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+    @computed_field
+    @property
+    def file_size_mb(self) -> float:
+        return round(self.file_size_bytes / (1024 * 1024), 2) if self.file_size_bytes else 0
+
+    @computed_field
+    @property
+    def resolution(self) -> str:
+        return f"{self.resolution_width}x{self.resolution_height}"
@@ -1,15 +1,21 @@
+import logging
+
 from fastapi import HTTPException, status
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
+from datetime import timedelta
 from app.models.user import User
-from app.models.session import SessionToken
 from app.dependencies import (
     hash_password,
     verify_password,
     generate_token
 )
 from app.config import settings
-from jose import jwt
+from app.services.cache import get_cache_service
+from utils.datetime_utils import now_utc
+from jose import jwt, JWTError, ExpiredSignatureError
+
+logger = logging.getLogger(__name__)
 
 class AuthService:
     """Service for handling authentication logic"""
@@ -29,49 +35,44 @@ class AuthService:
         # Hash password
         hashed_pwd = hash_password(password)
         
-        # ✅ Create new user WITHOUT id parameter
-        # SQLAlchemy will auto-generate UUID via default=uuid.uuid4
-        new_user = User(
-            # ❌ DELETE:  id=generate_user_id()
+        # Một timestamp tz-aware cho cả created_at lẫn exp
+        now = now_utc()
+        
+        # ✅ INSERT..RETURNING: the generated UUID comes back with the
+        # insert itself — no db.refresh() round trip after the commit
+        stmt = insert(User).values(
             email=email,
             name=name,
             password=hashed_pwd,
-            created_at=datetime.utcnow()
-        )
+            created_at=now
+        ).returning(User.id)
         
-        db.add(new_user)
+        new_user_id = db.execute(stmt).scalar_one()
         db.commit()
-        db.refresh(new_user)  # ✅ After this, new_user.id will have UUID value
         
-        # ✅ Debug
-        print(f"✅ Created user: {new_user.email}")
-        print(f"✅ User ID: {new_user.id} (type: {type(new_user.id)})")
+        logger.debug("✅ Created user %s (id=%s)", email, new_user_id)
         
         # ✅ Create JWT token
         access_token_expires = timedelta(days=settings.TOKEN_EXPIRY_DAYS)
-        expire = datetime.utcnow() + access_token_expires
+        expire = now + access_token_expires
         
         to_encode = {
-            "sub": str(new_user.id),  # ✅ Convert UUID to string
-            "email": new_user.email,
-            "name": new_user.name,
+            "sub": str(new_user_id),  # ✅ Convert UUID to string
+            "email": email,
+            "name": name,
             "exp": expire,
         }
         
-        print(f"✅ JWT payload: {to_encode}")
-        
         access_token = jwt.encode(
             to_encode,
             settings.SECRET_KEY,
             algorithm=settings.ALGORITHM
         )
         
-        print(f"✅ Generated JWT: {access_token[:50]}...")
-        
         return {
-            "id": str(new_user.id),  # ✅ Convert UUID to string for JSON
-            "email": new_user.email,
-            "name": new_user.name,
+            "id": str(new_user_id),  # ✅ Convert UUID to string for JSON
+            "email": email,
+            "name": name,
             "token": access_token
         }
     
@@ -96,7 +97,7 @@ class AuthService:
         
         # ✅ CREATE JWT TOKEN (NOT SESSION TOKEN)
         access_token_expires = timedelta(days=settings.TOKEN_EXPIRY_DAYS)
-        expire = datetime.utcnow() + access_token_expires
+        expire = now_utc() + access_token_expires
         
         # ✅ Create payload
         to_encode = {
@@ -113,10 +114,7 @@ class AuthService:
             algorithm=settings.ALGORITHM
         )
         
-        # ✅ Debug logging
-        print(f"✅ Login successful for:  {user.email}")
-        print(f"✅ Generated JWT token with {len(access_token.split('.'))} parts")
-        print(f"✅ Token preview: {access_token[:50]}...")
+        logger.debug("✅ Login successful for %s", user.email)
         
         return {
             "id": user.id,
@@ -127,50 +125,49 @@ class AuthService:
     
     @staticmethod
     def logout(db: Session, token: str) -> dict:
-        session = db.query(SessionToken).filter(SessionToken.token == token).first()
-        
-        if not session:
+        # Stateless tokens can't be deleted, so revoke for the remaining
+        # lifetime — the key expires exactly when the token itself would
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except JWTError:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid or expired token"
             )
         
-        db.delete(session)
-        db.commit()
+        remaining = int(payload["exp"] - now_utc().timestamp())
+        if remaining > 0:
+            get_cache_service().setex(f"revoked:{token}", remaining, "1")
         
         return {"message": "Logged out successfully"}
     
     @staticmethod
     def verify_token(db: Session, token: str) -> dict:
-        session = db.query(SessionToken).filter(SessionToken.token == token).first()
-        
-        if not session:
+        # Stateless verification: one HMAC check, no DB round trip.
+        # The JWT already carries user id/email/name and exp.
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except ExpiredSignatureError:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid or expired token"
+                detail="Token expired"
             )
-        
-        # Check if token is expired
-        if datetime.utcnow() > session.expires_at:
-            db.delete(session)
-            db.commit()
+        except JWTError:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Token expired"
+                detail="Invalid or expired token"
             )
         
-        # Get user info
-        user = db.query(User).filter(User.email == session.email).first()
-        
-        if not user:
+        # Revocation list check (populated by logout)
+        if get_cache_service().get(f"revoked:{token}") is not None:
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired token"
             )
         
         return {
-            "id": user.id,
-            "email": user.email,
-            "name": user.name,
+            "id": payload["sub"],
+            "email": payload.get("email"),
+            "name": payload.get("name"),
             "token": token
         }
\ No newline at end of file
@@ -0,0 +1,93 @@
+"""
+Cache Service - Redis-backed key/value cache with in-process fallback
+
+Dùng cho các lookup nóng (ownership, session tokens) để tránh query
+Postgres trên mỗi request. Nếu Redis không chạy, tự động fallback sang
+TTLCache trong process (đủ tốt cho single-worker deployments).
+"""
+
+import logging
+from typing import Optional
+
+from cachetools import TTLCache
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis = None
+    REDIS_AVAILABLE = False
+
+
+class CacheService:
+    """
+    Thin wrapper over Redis with get/setex/delete semantics.
+
+    Falls back to an in-process TTLCache when Redis is unreachable so the
+    API keeps working without the extra infrastructure.
+    """
+
+    def __init__(self, url: Optional[str] = None):
+        self._local = TTLCache(maxsize=100_000, ttl=300)
+        self._redis = None
+
+        if REDIS_AVAILABLE:
+            try:
+                self._redis = redis.Redis.from_url(
+                    url or settings.REDIS_URL,
+                    decode_responses=True,
+                    socket_connect_timeout=1,
+                )
+                self._redis.ping()
+                logger.info("✅ Cache service connected to Redis")
+            except Exception as e:
+                logger.warning("⚠️ Redis unavailable, using in-process cache: %s", e)
+                self._redis = None
+
+    def get(self, key: str) -> Optional[str]:
+        """Lấy value theo key, None nếu miss"""
+        if self._redis is not None:
+            try:
+                return self._redis.get(key)
+            except Exception as e:
+                logger.warning("⚠️ Redis get failed: %s", e)
+        return self._local.get(key)
+
+    def setex(self, key: str, ttl_seconds: int, value: str):
+        """Set key với TTL (seconds)"""
+        if self._redis is not None:
+            try:
+                self._redis.setex(key, ttl_seconds, value)
+                return
+            except Exception as e:
+                logger.warning("⚠️ Redis setex failed: %s", e)
+        self._local[key] = value
+
+    def delete(self, key: str):
+        """Xóa key (dùng để invalidate)"""
+        if self._redis is not None:
+            try:
+                self._redis.delete(key)
+            except Exception as e:
+                logger.warning("⚠️ Redis delete failed: %s", e)
+        self._local.pop(key, None)
+
+
+# Global singleton instance
+_cache_service_instance = None
+
+
+def get_cache_service() -> CacheService:
+    """
+    Get or create global CacheService instance
+    """
+    global _cache_service_instance
+
+    if _cache_service_instance is None:
+        _cache_service_instance = CacheService()
+
+    return _cache_service_instance
@@ -104,4 +104,12 @@ FOCUS_LEVELS = {
 }
 
 # ==================== TRACKING ====================
-FPS = 30  # frames per second for video processing
\ No newline at end of file
+FPS = 30  # frames per second for video processing
+
+# ==================== VOICE ALERT FILES ====================
+# Single source of truth: generate_voice_alerts.py writes these paths and
+# AlertManager loads them — a typo on either side silently drops the cue
+GENTLE_VOICE_FILE = 'assets/gentle_voice_alert.mp3'
+URGENT_VOICE_FILE = 'assets/urgent_voice_alert.mp3'
+MOTIVATIONAL_VOICE_FILE = 'assets/motivational_voice.mp3'
+CUSTOM_VOICE_FILE = 'assets/custom_voice.mp3'
\ No newline at end of file
@@ -2,66 +2,234 @@
 Smart Alert System - Cảnh báo thông minh với giọng nói AI
 """
 
+import logging
+import queue
+import threading
 import time
 from typing import Optional
 from config.constants import *
 import os
 
+# Voice alert files (MP3 from Edge TTS) — paths shared with
+# generate_voice_alerts.py via config.constants
+SOUND_FILES = {
+    'distracted': GENTLE_VOICE_FILE,
+    'severely_distracted': URGENT_VOICE_FILE,
+    'motivational': MOTIVATIONAL_VOICE_FILE
+}
+
+SAMPLE_RATE = 44100
+
+logger = logging.getLogger(__name__)
+
+
+def _resolve_sound_file(filepath):
+    """
+    Prefer the pre-decoded WAV variant (written by generate_voice_alerts.py)
+    over the MP3: no decoder startup, and playback volume is already baked
+    into the samples.
+
+    Returns:
+        (path, prebaked) — prebaked=True when the WAV was found
+    """
+    wav_path = filepath.replace('.mp3', '.wav')
+    if os.path.exists(wav_path):
+        return wav_path, True
+    return filepath, False
+
 
 class AlertManager:
     """
     Quản lý cảnh báo với cooldown và điều kiện kích hoạt
     """
-    
+
     def __init__(self):
         self.last_alert_time = 0
+        # Precomputed deadline: the common "still cooling down" path is a
+        # single float compare, no subtraction per frame
+        self._cooldown_until = 0.0
         self.alert_pending = False
         self.alert_trigger_start = None
-        
-        # Initialize pygame mixer for sound
+
+        # Audio backend is initialized lazily: short sessions that never
+        # trigger an alert pay no mixer startup cost and no idle CPU drain
         self.sound_enabled = False
         self.sounds = {}
+        self._backend = None
+        self._stream = None
+        self._play_queue = None
+        self._alert_channel = None
+        self._sound_initialized = False
+
+    def _ensure_sound(self):
+        """Initialize the audio backend on the first alert, once"""
+        if self._sound_initialized:
+            return
+        self._sound_initialized = True
         self._init_sound()
-        
+
     def _init_sound(self):
-        """Initialize pygame mixer and load sounds"""
-        try: 
+        """
+        Initialize audio and load sounds.
+
+        Preferred path: decode the MP3s once to raw int16 PCM and keep one
+        PortAudio output stream open for the life of the app — playback is
+        then a plain buffer write with no per-alert decode, no mixer state
+        and no cross-app interference. Falls back to pygame.mixer when
+        sounddevice isn't available.
+        """
+        try:
+            self._init_sounddevice()
+            return
+        except ImportError:
+            pass
+        except Exception as e:
+            logger.warning("⚠️ sounddevice init failed (%s), falling back to pygame", e)
+
+        self._init_pygame()
+
+    def _init_sounddevice(self):
+        """Decode MP3s to PCM arrays and open a persistent output stream"""
+        import numpy as np
+        import sounddevice as sd
+
+        for level, filepath in SOUND_FILES.items():
+            filepath, prebaked = _resolve_sound_file(filepath)
+            if not os.path.exists(filepath):
+                continue
+            pcm = self._decode_to_pcm(filepath)
+            if pcm is None:
+                continue
+            if prebaked:
+                # WAV already carries the playback gain
+                self.sounds[level] = pcm
+            else:
+                # Bake volume into the samples (80% for urgent, 60% otherwise)
+                volume = 0.8 if level == 'severely_distracted' else 0.6
+                self.sounds[level] = (pcm * volume).astype(np.int16)
+
+        if not self.sounds:
+            logger.warning("⚠️ No voice alert files found. Run: python generate_voice_alerts.py")
+            return
+
+        # One always-open stream: small blocksize + low latency so the first
+        # sample hits the device without mixer spin-up delay
+        self._stream = sd.OutputStream(
+            samplerate=SAMPLE_RATE,
+            channels=2,
+            dtype='int16',
+            blocksize=256,
+            latency='low'
+        )
+        self._stream.start()
+
+        # Warm the device path with a short silence write so the first
+        # real alert doesn't pay the initial buffer fill
+        self._stream.write(np.zeros((256, 2), dtype=np.int16))
+
+        # Playback happens on its own thread — the detection loop only
+        # enqueues, it never blocks on audio
+        self._play_queue = queue.Queue()
+        threading.Thread(target=self._playback_loop, daemon=True).start()
+
+        self._backend = 'sounddevice'
+        self.sound_enabled = True
+        logger.info("✅ Loaded %d voice alerts (sounddevice)", len(self.sounds))
+
+    @staticmethod
+    def _decode_to_pcm(filepath):
+        """Decode one audio file to a 44100 Hz stereo int16 ndarray"""
+        import numpy as np
+        try:
+            import soundfile as sf
+            data, rate = sf.read(filepath, dtype='int16', always_2d=True)
+            if rate == SAMPLE_RATE and data.shape[1] == 2:
+                return data
+        except Exception:
+            pass
+
+        try:
+            from pydub import AudioSegment
+            seg = AudioSegment.from_file(filepath)
+            seg = seg.set_frame_rate(SAMPLE_RATE).set_channels(2).set_sample_width(2)
+            return np.array(seg.get_array_of_samples(), dtype=np.int16).reshape(-1, 2)
+        except Exception as e:
+            logger.warning("⚠️ Failed to decode %s: %s", filepath, e)
+            return None
+
+    def _playback_loop(self):
+        """Worker thread: pull PCM buffers and write to the open stream"""
+        while True:
+            pcm = self._play_queue.get()
+            try:
+                self._stream.write(pcm)
+            except Exception as e:
+                logger.warning("🔔 Playback failed: %s", e)
+
+    def _enqueue(self, pcm):
+        """Queue a PCM buffer, dropping anything still waiting to play"""
+        try:
+            while True:
+                self._play_queue.get_nowait()
+        except queue.Empty:
+            pass
+        self._play_queue.put(pcm)
+
+    def _init_pygame(self):
+        """Fallback: pygame mixer with Sound objects"""
+        try:
             import pygame
-            pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=2048)
-            
-            # Load voice alert files (MP3 from Edge TTS)
-            sound_files = {
-                'distracted': 'assets/gentle_voice_alert.mp3',
-                'severely_distracted': 'assets/urgent_voice_alert.mp3',
-                'motivational': 'assets/motivational_voice.mp3'
-            }
-            
-            for level, filepath in sound_files.items():
+            # 512-sample buffer: ~4x lower latency than the 2048 default,
+            # safe for short one-shot MP3 cues
+            pygame.mixer.pre_init(44100, -16, 2, 512)
+            pygame.mixer.init()
+
+            for level, filepath in SOUND_FILES.items():
+                filepath, prebaked = _resolve_sound_file(filepath)
                 if os.path.exists(filepath):
                     self.sounds[level] = pygame.mixer.Sound(filepath)
-                    
-                    # Set volume based on level
-                    if level == 'severely_distracted':
-                        self.sounds[level].set_volume(0.8)  # 80% volume
-                    else:
-                        self.sounds[level].set_volume(0.6)  # 60% volume
-            
+
+                    if not prebaked:
+                        # Set volume based on level
+                        if level == 'severely_distracted':
+                            self.sounds[level].set_volume(0.8)  # 80% volume
+                        else:
+                            self.sounds[level].set_volume(0.6)  # 60% volume
+
             if self.sounds:
+                # Warm-up: play each sound once on a muted channel so the
+                # samples are paged in and decoded before the first real
+                # alert — kills first-trigger latency
+                try:
+                    warm = pygame.mixer.Channel(7)
+                    warm.set_volume(0)
+                    for sound in self.sounds.values():
+                        warm.play(sound)
+                        warm.stop()
+                except Exception:
+                    pass
+
+                # One reserved channel for alerts: stop/play is a single
+                # channel op instead of a stop() sweep over every Sound
+                pygame.mixer.set_reserved(1)
+                self._alert_channel = pygame.mixer.Channel(0)
+
+                self._backend = 'pygame'
                 self.sound_enabled = True
-                print(f"✅ Loaded {len(self.sounds)} voice alerts")
+                logger.info("✅ Loaded %d voice alerts", len(self.sounds))
             else:
-                print("⚠️ No voice alert files found.")
-                print("   Run:  python generate_voice_alerts.py")
-                
+                logger.warning("⚠️ No voice alert files found. Run: python generate_voice_alerts.py")
+
         except ImportError:
-            print("⚠️ pygame not installed.Install with: pip install pygame")
+            logger.warning("⚠️ pygame not installed.Install with: pip install pygame")
         except Exception as e:
-            print(f"⚠️ Failed to initialize sound: {str(e)}")
+            logger.warning("⚠️ Failed to initialize sound: %s", e)
         
     def should_alert(
         self,
         focus_score: float,
-        distraction_duration: Optional[float]
+        distraction_duration: Optional[float],
+        now: Optional[float] = None
     ) -> bool:
         """
         Quyết định có nên cảnh báo không
@@ -74,10 +242,10 @@ class AlertManager:
         Returns:
             True nếu cần cảnh báo
         """
-        current_time = time.time()
-        
-        # Check cooldown
-        if current_time - self.last_alert_time < ALERT_COOLDOWN:
+        current_time = now if now is not None else time.time()
+
+        # Check cooldown (deadline compare, computed once per alert)
+        if current_time < self._cooldown_until:
             return False
         
         # Check score threshold
@@ -92,6 +260,7 @@ class AlertManager:
         
         if distraction_duration >= ALERT_TRIGGER_DURATION:
             self.last_alert_time = current_time
+            self._cooldown_until = current_time + ALERT_COOLDOWN
             self.alert_trigger_start = None
             return True
         
@@ -112,30 +281,36 @@ class AlertManager:
         """
         Phát giọng nói AI nhắc nhở
         """
+        self._ensure_sound()
         if self.sound_enabled and level in self.sounds:
             try:
-                # Stop any currently playing alert
-                for sound in self.sounds.values():
-                    sound.stop()
-                
-                # Play new alert
-                self.sounds[level].play()
-                print(f"🔊 Playing voice alert for level: {level}")
+                if self._backend == 'sounddevice':
+                    self._enqueue(self.sounds[level])
+                else:
+                    # Stop whatever the alert channel is playing and play
+                    # the new cue — one channel op, no per-Sound sweep
+                    self._alert_channel.stop()
+                    self._alert_channel.play(self.sounds[level])
+                logger.info("🔊 Playing voice alert for level: %s", level)
             except Exception as e:
-                print(f"🔔 Failed to play sound: {str(e)}")
+                logger.warning("🔔 Failed to play sound: %s", e)
         else:
-            print(f"🔔 Alert for level: {level} (voice not available)")
+            logger.info("🔔 Alert for level: %s (voice not available)", level)
             if not self.sound_enabled:
-                print("   Tip: Run 'python generate_voice_alerts.py' to generate voices")
+                logger.info("   Tip: Run 'python generate_voice_alerts.py' to generate voices")
     
     def play_motivational(self):
         """
         Phát lời động viên khi học tốt
         (Có thể gọi khi focus_score > 90 liên tục)
         """
+        self._ensure_sound()
         if self.sound_enabled and 'motivational' in self.sounds:
             try:
-                self.sounds['motivational'].play()
-                print("🎉 Playing motivational message")
-            except Exception as e: 
-                print(f"Failed to play motivational sound: {str(e)}")
\ No newline at end of file
+                if self._backend == 'sounddevice':
+                    self._enqueue(self.sounds['motivational'])
+                else:
+                    self._alert_channel.play(self.sounds['motivational'])
+                logger.info("🎉 Playing motivational message")
+            except Exception as e:
+                logger.warning("Failed to play motivational sound: %s", e)
\ No newline at end of file
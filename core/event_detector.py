@@ -19,6 +19,9 @@ class EventDetector:
     
     def __init__(self):
         self.no_face_start = None
+        # "cell phone" class id, resolved once from the model's name map on
+        # the first frame (the model is passed in, not owned here)
+        self._phone_cls_id = None
         
     def detect_events(
         self,
@@ -26,7 +29,8 @@ class EventDetector:
         det_results,
         pose_results,
         det_model,
-        pose_model
+        pose_model,
+        now: float = None
     ) -> Dict[str, bool]:
         """
         Phát hiện events trong 1 frame
@@ -54,7 +58,7 @@ class EventDetector:
             events['left_seat'] = False
         else:
             # Không có người → check left seat
-            events['left_seat'] = self._check_left_seat()
+            events['left_seat'] = self._check_left_seat(now)
         
         return events
     
@@ -66,18 +70,24 @@ class EventDetector:
             if det_results is None: 
                 return False
             
-            for r in det_results: 
-                if hasattr(r, 'boxes') and r.boxes is not None:
-                    for box in r.boxes:
-                        try:
-                            cls_id = int(box.cls[0])
-                            label = det_model.names[cls_id]
-                            conf = float(box.conf[0])
-                            
-                            if label == "cell phone" and conf >= PHONE_CONFIDENCE_THRESHOLD:
-                                return True
-                        except (IndexError, KeyError, TypeError):
-                            continue
+            if self._phone_cls_id is None:
+                self._phone_cls_id = next(
+                    (cid for cid, name in det_model.names.items() if name == "cell phone"),
+                    -1
+                )
+            
+            # ✅ One tensor op per result instead of a Python loop with a
+            # dict lookup and string compare per box
+            for r in det_results:
+                boxes = getattr(r, 'boxes', None)
+                if boxes is None or boxes.cls is None or len(boxes) == 0:
+                    continue
+                hit = (
+                    (boxes.cls == self._phone_cls_id)
+                    & (boxes.conf >= PHONE_CONFIDENCE_THRESHOLD)
+                ).any()
+                if bool(hit.item() if hasattr(hit, 'item') else hit):
+                    return True
         except Exception:
             pass
         
@@ -94,41 +104,32 @@ class EventDetector:
             if pose_results is None or len(pose_results) == 0:
                 return False
             
-            # Check if keypoints exist
-            if not hasattr(pose_results[0], 'keypoints'):
-                return False
-            
-            if pose_results[0].keypoints is None:
+            # Cache attribute chain once per frame
+            keypoints = getattr(pose_results[0], 'keypoints', None)
+            if keypoints is None:
                 return False
             
-            # Check if xy tensor exists and has data
-            if not hasattr(pose_results[0].keypoints, 'xy'):
+            xy_data = getattr(keypoints, 'xy', None)
+            if xy_data is None or xy_data.shape[0] == 0:
                 return False
             
-            xy_data = pose_results[0].keypoints.xy
-            
-            if xy_data is None or len(xy_data) == 0:
-                return False
-            
-            # Get keypoints
-            kpts = xy_data[0].cpu().numpy()
-            
-            if len(kpts) == 0:
+            # ✅ Stay on the tensor: no .cpu().numpy() round trip per frame.
+            # One mask covers both the nose check and the >=3 fallback, and
+            # only the final boolean crosses to the host via .item()
+            xy = xy_data[0]
+            if xy.shape[0] == 0:
                 return False
             
-            # Check if at least one keypoint is visible (not [0, 0])
-            # Nose (index 0) is usually most reliable
-            if kpts.shape[0] > 0 and kpts[0][0] > 0 and kpts[0][1] > 0:
-                return True
+            visible = (xy[:, 0] > 0) & (xy[:, 1] > 0)
             
-            # Fallback: check if any keypoint is visible
-            visible_kpts = np.sum((kpts[: , 0] > 0) & (kpts[:, 1] > 0))
-            return visible_kpts >= 3  # Ít nhất 3 keypoints visible
+            # Nose (index 0) is usually most reliable; otherwise require at
+            # least 3 visible keypoints
+            return bool((visible[0] | (visible.sum() >= 3)).item())
             
         except Exception:
             return False
     
-    def _check_left_seat(self) -> bool:
+    def _check_left_seat(self, now: float = None) -> bool:
         """
         Kiểm tra rời khỏi chỗ ngồi
         (không thấy người > FACE_MISSING_TIMEOUT)
@@ -137,7 +138,7 @@ class EventDetector:
             True nếu rời chỗ ngồi
         """
         try:
-            current_time = time.time()
+            current_time = now if now is not None else time.time()
             
             if self.no_face_start is None:
                 # Bắt đầu đếm thời gian không thấy người
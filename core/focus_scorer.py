@@ -4,10 +4,82 @@ Chỉ xử lý: Phone & Left Seat
 """
 
 import time
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
+import numpy as np
 from config.constants import *
 from utils.smoothing import ExponentialMovingAverage
 
+# Ring buffer capacity: 1 hour of history at the nominal frame rate
+HISTORY_CAPACITY = FPS * 3600
+
+# Optional numba JIT: when installed, the per-frame score step compiles to
+# native code (cached on disk); otherwise the plain-Python function runs
+try:
+    from numba import njit as _njit
+except ImportError:
+    def _njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        def deco(func):
+            return func
+        return deco
+
+# Event bools packed into one uint8 per frame
+PHONE_BIT = 1
+LEFT_SEAT_BIT = 2
+
+# Score -> level lookup table built once from FOCUS_LEVELS: integer scores
+# 0..100 map straight to a level index, replacing the per-frame dict scan
+_LEVEL_NAMES = list(FOCUS_LEVELS.keys())
+_LEVEL_COLORS = {
+    'highly_focused': '#00FF00',
+    'focused': '#90EE90',
+    'distracted': '#FFA500',
+    'severely_distracted': '#FF0000'
+}
+_LEVEL_LUT = np.full(101, -1, dtype=np.int8)
+for _idx, (_name, (_lo, _hi)) in enumerate(FOCUS_LEVELS.items()):
+    _LEVEL_LUT[_lo:_hi + 1] = _idx
+
+
+def level_for_score(score: float) -> Tuple[str, str]:
+    """(level_name, color) cho một điểm 0-100 — O(1) array load"""
+    idx = _LEVEL_LUT[min(100, max(0, int(score)))]
+    if idx < 0:
+        return 'unknown', '#FFFFFF'
+    name = _LEVEL_NAMES[idx]
+    return name, _LEVEL_COLORS[name]
+
+
+@_njit(cache=True)
+def _score_step(score_raw, score, delta_t, phone, left_seat, already_left):
+    """
+    One per-frame score update on scalars only.
+
+    Free function so numba can compile it (constants inline as globals);
+    returns (new_raw, new_score, penalty, recovery).
+    """
+    penalty = 0.0
+    if phone:
+        penalty += PENALTY_PHONE_DETECTED
+    if left_seat and not already_left:
+        penalty += PENALTY_LEFT_SEAT
+
+    recovery = 0.0
+    if penalty == 0.0 and not phone and not left_seat:
+        recovery = RECOVERY_RATE_PER_SEC * delta_t
+        if recovery > MAX_RECOVERY_PER_UPDATE:
+            recovery = MAX_RECOVERY_PER_UPDATE
+
+    raw = score_raw - penalty + recovery
+    if raw < 0.0:
+        raw = 0.0
+    elif raw > 100.0:
+        raw = 100.0
+
+    new_score = EMA_ALPHA * raw + (1.0 - EMA_ALPHA) * score
+    return raw, new_score, penalty, recovery
+
 
 class FocusScorer:
     """
@@ -27,10 +99,17 @@ class FocusScorer:
         # Event tracking (for time-based penalties)
         self.left_seat_start = None
         
-        # History for analytics
-        self.history = []
-        
-    def update(self, events: Dict[str, bool]) -> float:
+        # History for analytics - NumPy ring buffer, one column per field
+        # instead of one dict per frame (108k dicts for an hour at 30fps)
+        self._hist_ts = np.empty(HISTORY_CAPACITY, dtype=np.float64)
+        self._hist_score = np.empty(HISTORY_CAPACITY, dtype=np.float32)
+        self._hist_raw = np.empty(HISTORY_CAPACITY, dtype=np.float32)
+        self._hist_penalty = np.empty(HISTORY_CAPACITY, dtype=np.float32)
+        self._hist_recovery = np.empty(HISTORY_CAPACITY, dtype=np.float32)
+        self._hist_events = np.zeros(HISTORY_CAPACITY, dtype=np.uint8)
+        self._hist_count = 0
+
+    def update(self, events: Dict[str, bool], now: Optional[float] = None) -> float:
         """
         Cập nhật điểm dựa trên các event hiện tại
         
@@ -39,61 +118,61 @@ class FocusScorer:
                 'phone_detected': bool,
                 'left_seat':  bool
             }
+            now: Frame clock — callers that already read the clock this
+                frame pass it in so every component sees one timestamp
             
         Returns:
             Current focus score (0-100)
         """
-        current_time = time.time()
+        current_time = now if now is not None else time.time()
         delta_t = current_time - self.last_update_time
         
-        # Calculate penalties
-        total_penalty = 0.0
+        # Read events once; the scalar step function does the rest
+        phone = events.get('phone_detected', False)
+        left_seat = events.get('left_seat', False)
+        any_event = phone or left_seat
+        already_left = self.left_seat_start is not None
         
-        # 1.Phone detected (discrete penalty)
-        if events.get('phone_detected', False):
-            total_penalty += PENALTY_PHONE_DETECTED
-            self.last_violation_time = current_time
+        self.score_raw, self.score, total_penalty, recovery = _score_step(
+            self.score_raw, self.score, delta_t, phone, left_seat, already_left
+        )
         
-        # 2.Left seat (discrete penalty - chỉ áp dụng 1 lần khi mới rời)
-        if events.get('left_seat', False):
-            if self.left_seat_start is None:
-                # Mới rời chỗ ngồi → trừ điểm
-                total_penalty += PENALTY_LEFT_SEAT
+        # Violation / seat bookkeeping (Python-side: touches None-able state)
+        if phone:
+            self.last_violation_time = current_time
+        if left_seat:
+            if not already_left:
+                # Mới rời chỗ ngồi → đã trừ điểm trong _score_step
                 self.left_seat_start = current_time
-            # Nếu đã rời từ trước → không trừ thêm
         else:
             # Quay lại chỗ ngồi → reset
             self.left_seat_start = None
         
-        # 3.Recovery (nếu không có vi phạm)
-        recovery = 0.0
-        if total_penalty == 0 and not any(events.values()):
-            recovery = min(RECOVERY_RATE_PER_SEC * delta_t, MAX_RECOVERY_PER_UPDATE)
-        else:
-            # Track distraction period
-            if self.distraction_start_time is None:
-                self.distraction_start_time = current_time
-        
-        # If no distraction, reset tracking
-        if total_penalty == 0 and not any(events.values()):
+        if total_penalty == 0 and not any_event:
             self.distraction_start_time = None
+        elif self.distraction_start_time is None:
+            self.distraction_start_time = current_time
         
-        # 4.Update raw score
-        self.score_raw = max(0, min(100, self.score_raw - total_penalty + recovery))
-        
-        # 5.Apply EMA smoothing
-        self.score = self.ema.update(self.score_raw)
-        
-        # 6.Save to history
-        self.history.append({
-            'timestamp': current_time,
-            'score': self.score,
-            'score_raw': self.score_raw,
-            'penalty': total_penalty,
-            'recovery': recovery,
-            'events': events.copy()
-        })
+        # Keep the EMA object in sync for anyone reading it directly
+        self.ema.value = self.score
         
+        # Save to history
+        i = self._hist_count % HISTORY_CAPACITY
+        self._hist_ts[i] = current_time
+        self._hist_score[i] = self.score
+        self._hist_raw[i] = self.score_raw
+        self._hist_penalty[i] = total_penalty
+        self._hist_recovery[i] = recovery
+
+        bits = 0
+        if phone:
+            bits |= PHONE_BIT
+        if left_seat:
+            bits |= LEFT_SEAT_BIT
+        self._hist_events[i] = bits
+
+        self._hist_count += 1
+
         self.last_update_time = current_time
         return self.score
     
@@ -104,25 +183,15 @@ class FocusScorer:
         Returns:
             (level_name, color)
         """
-        for level, (min_score, max_score) in FOCUS_LEVELS.items():
-            if min_score <= self.score <= max_score:
-                colors = {
-                    'highly_focused':  '#00FF00',
-                    'focused':  '#90EE90',
-                    'distracted': '#FFA500',
-                    'severely_distracted': '#FF0000'
-                }
-                return level, colors[level]
-        
-        return 'unknown', '#FFFFFF'
+        return level_for_score(self.score)
     
-    def get_distraction_duration(self) -> Optional[float]: 
+    def get_distraction_duration(self, now: Optional[float] = None) -> Optional[float]: 
         """
         Trả về thời gian mất tập trung liên tục (seconds)
         """
         if self.distraction_start_time is None:
             return None
-        return time.time() - self.distraction_start_time
+        return (now if now is not None else time.time()) - self.distraction_start_time
     
     def reset(self):
         """Reset về trạng thái ban đầu"""
@@ -133,27 +202,85 @@ class FocusScorer:
         self.distraction_start_time = None
         self.last_violation_time = None
         self.left_seat_start = None
-        
+        self._hist_events[:] = 0
+        self._hist_count = 0
+
+    def _history_order(self) -> np.ndarray:
+        """Chronological indices into the ring buffer"""
+        if self._hist_count <= HISTORY_CAPACITY:
+            return np.arange(self._hist_count)
+        start = self._hist_count % HISTORY_CAPACITY
+        return np.concatenate([
+            np.arange(start, HISTORY_CAPACITY),
+            np.arange(0, start)
+        ])
+
+    @property
+    def history_len(self) -> int:
+        """Số frames hiện có trong history"""
+        return min(self._hist_count, HISTORY_CAPACITY)
+
+    def history_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        History dưới dạng các mảng NumPy theo thứ tự thời gian — đường
+        nhanh cho export/stats, không materialize list of dicts.
+        """
+        order = self._history_order()
+        events = self._hist_events[order]
+        return {
+            'timestamp': self._hist_ts[order],
+            'score': self._hist_score[order],
+            'score_raw': self._hist_raw[order],
+            'penalty': self._hist_penalty[order],
+            'recovery': self._hist_recovery[order],
+            'phone_detected': (events & PHONE_BIT).astype(np.bool_),
+            'left_seat': (events & LEFT_SEAT_BIT).astype(np.bool_),
+        }
+
+    @property
+    def history(self) -> List[Dict]:
+        """
+        History dưới dạng list of dicts (cho export/save).
+
+        Materializes the ring buffer; hot paths should use the arrays or
+        history_len instead.
+        """
+        order = self._history_order()
+        events = self._hist_events[order]
+        return [
+            {
+                'timestamp': float(self._hist_ts[i]),
+                'score': float(self._hist_score[i]),
+                'score_raw': float(self._hist_raw[i]),
+                'penalty': float(self._hist_penalty[i]),
+                'recovery': float(self._hist_recovery[i]),
+                'events': {
+                    'phone_detected': bool(bits & PHONE_BIT),
+                    'left_seat': bool(bits & LEFT_SEAT_BIT),
+                },
+            }
+            for i, bits in zip(order, events)
+        ]
+
     def get_session_stats(self) -> Dict:
         """
         Thống kê toàn session
         """
-        if not self.history:
+        if self._hist_count == 0:
             return {}
-        
-        scores = [h['score'] for h in self.history]
-        
-        # Đếm số lần vi phạm từng loại
-        phone_violations = sum(1 for h in self.history if h['events'].get('phone_detected', False))
-        left_seat_violations = sum(1 for h in self.history if h['events'].get('left_seat', False))
-        
+
+        order = self._history_order()
+        scores = self._hist_score[order]
+        events = self._hist_events[order]
+        ts = self._hist_ts[order]
+
         return {
-            'avg_score': sum(scores) / len(scores),
-            'min_score': min(scores),
-            'max_score': max(scores),
+            'avg_score': float(scores.mean()),
+            'min_score': float(scores.min()),
+            'max_score': float(scores.max()),
             'final_score': self.score,
-            'total_violations': sum(1 for h in self.history if any(h['events'].values())),
-            'phone_detected_count': phone_violations,
-            'left_seat_count': left_seat_violations,
-            'duration_seconds': self.history[-1]['timestamp'] - self.history[0]['timestamp']
+            'total_violations': int(np.count_nonzero(events)),
+            'phone_detected_count': int(np.count_nonzero(events & PHONE_BIT)),
+            'left_seat_count': int(np.count_nonzero(events & LEFT_SEAT_BIT)),
+            'duration_seconds': float(ts[-1] - ts[0])
         }
\ No newline at end of file
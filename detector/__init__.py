@@ -1 +1,2 @@
+from detector.model_registry import get_yolo
 from detector.phone_detector import PhoneDetector
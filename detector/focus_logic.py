@@ -1,19 +1,37 @@
+def _build_dispatch():
+    # Precompute the outcome for every (phone, no_pose, yaw_bad, pitch_bad)
+    # combination so evaluate() is two threshold compares and one dict
+    # lookup instead of a branch cascade. Priority order matches the
+    # original if-chain: phone > no face > yaw > pitch.
+    table = {}
+    for phone in (False, True):
+        for no_pose in (False, True):
+            for yaw_bad in (False, True):
+                for pitch_bad in (False, True):
+                    if phone:
+                        out = (False, "Phone detected")
+                    elif no_pose:
+                        out = (False, "No face detected")
+                    elif yaw_bad:
+                        out = (False, "Head turned")
+                    elif pitch_bad:
+                        out = (False, "Looking down/up")
+                    else:
+                        out = (True, "Focused")
+                    table[(phone, no_pose, yaw_bad, pitch_bad)] = out
+    return table
+
+
+_DISPATCH = _build_dispatch()
+
+
 class FocusLogic:
     def __init__(self, yaw_thresh=25, pitch_thresh=20):
         self.yaw_thresh = yaw_thresh
         self.pitch_thresh = pitch_thresh
 
     def evaluate(self, phone_detected, pose):
-        if phone_detected:
-            return False, "Phone detected"
-
-        if pose is None:
-            return False, "No face detected"
-
-        if abs(pose["yaw"]) > self.yaw_thresh:
-            return False, "Head turned"
-
-        if abs(pose["pitch"]) > self.pitch_thresh:
-            return False, "Looking down/up"
-
-        return True, "Focused"
+        no_pose = pose is None
+        yaw_bad = not no_pose and abs(pose["yaw"]) > self.yaw_thresh
+        pitch_bad = not no_pose and abs(pose["pitch"]) > self.pitch_thresh
+        return _DISPATCH[(bool(phone_detected), no_pose, yaw_bad, pitch_bad)]
@@ -0,0 +1,35 @@
+import logging
+import os
+
+import torch
+from ultralytics import YOLO
+
+logger = logging.getLogger(__name__)
+
+# Detectors only ever run forward passes: turn autograd off process-wide
+# (inference_mode at the call sites also kills view tracking) and cap the
+# intra-op thread pool so inference doesn't fight the rest of the app
+torch.set_grad_enabled(False)
+torch.set_num_threads(max(1, (os.cpu_count() or 2) // 2))
+
+# Module-level cache: one YOLO instance (and one CUDA context worth of
+# weights) per checkpoint path, shared by every detector in the process
+_models = {}
+
+
+def get_yolo(model_path: str) -> YOLO:
+    """
+    Load a YOLO checkpoint once and reuse it everywhere.
+
+    The model is Conv+BN fused after load (fewer kernels per frame);
+    fusing is best-effort since exported formats don't support it.
+    """
+    model = _models.get(model_path)
+    if model is None:
+        model = YOLO(model_path)
+        try:
+            model.fuse()
+        except Exception as e:
+            logger.debug("fuse() skipped for %s: %s", model_path, e)
+        _models[model_path] = model
+    return model
@@ -1,18 +1,32 @@
-from ultralytics import YOLO
+import torch
+
+from detector.model_registry import get_yolo
 
 class PhoneDetector:
     def __init__(self, model_path="models/yolov8n.pt"):
-        self.model = YOLO(model_path)
+        self.model = get_yolo(model_path)
+        # FP16 on GPU: ~2x matmul/conv throughput, half the activation bandwidth
+        self.device = 0 if torch.cuda.is_available() else "cpu"
+        self.half = self.device != "cpu"
+        # Resolve the "cell phone" class id once; the hot loop compares ints
+        self._phone_cls_id = next(
+            (cid for cid, name in self.model.names.items() if name == "cell phone"),
+            -1
+        )
 
     def detect(self, frame, conf=0.5):
-        results = self.model(frame, conf=conf, verbose=False)
+        # inference_mode: no autograd or view-tracking bookkeeping on the
+        # forward pass (strictly cheaper than no_grad)
+        with torch.inference_mode():
+            results = self.model(
+                frame, conf=conf, verbose=False,
+                half=self.half, device=self.device, imgsz=640
+            )
         phones = []
 
         for r in results:
-            for box in r.boxes:
-                cls = int(box.cls[0])
-                label = self.model.names[cls]
-                if label == "cell phone":
-                    phones.append(box.xyxy[0].cpu().numpy())
+            mask = r.boxes.cls == self._phone_cls_id
+            if mask.any():
+                phones.extend(r.boxes.xyxy[mask].cpu().numpy())
 
         return phones
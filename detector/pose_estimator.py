@@ -1,12 +1,24 @@
-import numpy as np
-from ultralytics import YOLO
+from math import atan2, degrees
+
+import torch
+
+from detector.model_registry import get_yolo
 
 class PoseEstimator:
     def __init__(self, model_path="models/yolov8n-pose.pt"):
-        self.model = YOLO(model_path)
+        self.model = get_yolo(model_path)
+        # FP16 on GPU: ~2x matmul/conv throughput, half the activation bandwidth
+        self.device = 0 if torch.cuda.is_available() else "cpu"
+        self.half = self.device != "cpu"
 
     def estimate(self, frame):
-        results = self.model(frame, verbose=False)
+        # inference_mode: no autograd or view-tracking bookkeeping on the
+        # forward pass (strictly cheaper than no_grad)
+        with torch.inference_mode():
+            results = self.model(
+                frame, verbose=False,
+                half=self.half, device=self.device, imgsz=640
+            )
 
         if (
             not results
@@ -15,15 +27,20 @@ class PoseEstimator:
         ):
             return None
 
-        kpts = results[0].keypoints.xy[0].cpu().numpy()
+        # Only nose + eyes are needed: slice before .cpu() so just 3
+        # keypoints cross the device boundary instead of all 17
+        kpts = results[0].keypoints.xy[0, :3].cpu().numpy()
 
         nose = kpts[0]
         left_eye = kpts[1]
         right_eye = kpts[2]
-        eye_center = (left_eye + right_eye) / 2
 
-        yaw = np.degrees(np.arctan2(nose[0] - eye_center[0], 100))
-        pitch = np.degrees(np.arctan2(nose[1] - eye_center[1], 100))
+        # Scalar math.atan2/degrees: no NumPy dispatch or temporary
+        # eye_center array for what is a pair of scalar angles
+        dx = float(nose[0] - (left_eye[0] + right_eye[0]) * 0.5)
+        dy = float(nose[1] - (left_eye[1] + right_eye[1]) * 0.5)
+        yaw = degrees(atan2(dx, 100.0))
+        pitch = degrees(atan2(dy, 100.0))
 
         return {
             "yaw": yaw,
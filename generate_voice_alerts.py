@@ -6,6 +6,14 @@ High quality Vietnamese voices - FREE!
 import asyncio
 import edge_tts
 import os
+import subprocess
+
+from config.constants import (
+    GENTLE_VOICE_FILE,
+    URGENT_VOICE_FILE,
+    MOTIVATIONAL_VOICE_FILE,
+    CUSTOM_VOICE_FILE,
+)
 
 # Create assets directory
 os.makedirs('assets', exist_ok=True)
@@ -18,26 +26,50 @@ VIETNAMESE_VOICES = {
 }
 
 
-async def generate_voice(text: str, output_file: str, voice:  str = 'vi-VN-HoaiMyNeural', rate: str = '+0%', volume: str = '+0%'):
+async def generate_voice(text: str, output_file: str, voice:  str = 'vi-VN-HoaiMyNeural', rate: str = '+0%', volume: str = '+0%', gain: float = None):
     """
     Generate voice from text using Edge TTS
-    
+
     Args:
         text: Text to convert to speech
         output_file: Output filename (e.g., 'assets/alert.mp3')
         voice: Voice ID (see VIETNAMESE_VOICES)
         rate: Speaking rate (-50% to +100%, default +0%)
         volume: Volume (-50% to +50%, default +0%)
+        gain: Playback gain baked into the WAV (e.g. 0.8), None = as-is
     """
     print(f"🎙️ Generating:  {output_file}")
     print(f"   Text: {text}")
     print(f"   Voice: {voice}")
-    
+
     communicate = edge_tts.Communicate(text, voice, rate=rate, volume=volume)
     await communicate.save(output_file)
-    
+
     print(f"✅ Saved:  {output_file}\n")
 
+    _transcode_to_wav(output_file, gain)
+
+
+def _transcode_to_wav(mp3_file: str, gain: float = None):
+    """
+    Pre-decode the MP3 to 44100 Hz / 16-bit stereo WAV.
+
+    AlertManager loads the WAV variant preferentially: no MP3 decode at
+    every process start, and playback gain is baked into the samples so
+    there is no runtime volume stage.
+    """
+    wav_file = mp3_file.replace('.mp3', '.wav')
+    cmd = ['ffmpeg', '-y', '-i', mp3_file, '-ar', '44100', '-ac', '2', '-sample_fmt', 's16']
+    if gain is not None:
+        cmd += ['-filter:a', f'volume={gain}']
+    cmd.append(wav_file)
+
+    try:
+        subprocess.run(cmd, check=True, capture_output=True)
+        print(f"✅ Pre-decoded: {wav_file}\n")
+    except (FileNotFoundError, subprocess.CalledProcessError) as e:
+        print(f"⚠️ WAV pre-decode skipped ({e}) — MP3 will be decoded at runtime\n")
+
 
 async def generate_all_alerts():
     """Generate all alert voices"""
@@ -51,36 +83,43 @@ async def generate_all_alerts():
     alerts = {
         'gentle':  {
             'text': 'Bạn đang trong quá trình học tập, hãy tập trung nào',
-            'file': 'assets/gentle_voice_alert.mp3',
+            'file': GENTLE_VOICE_FILE,
             'voice':  VIETNAMESE_VOICES['female_north'],
             'rate': '+0%',
-            'volume': '+0%'
+            'volume': '+0%',
+            'gain': 0.6  # 60% playback volume, baked into the WAV
         },
         'urgent': {
             'text':  'Chú ý! Bạn đã mất tập trung quá lâu. Hãy quay lại bài học nhé',
-            'file': 'assets/urgent_voice_alert.mp3',
+            'file': URGENT_VOICE_FILE,
             'voice':  VIETNAMESE_VOICES['female_north'],
             'rate':  '+5%',  # Nói nhanh hơn 5%
-            'volume': '+10%'  # To hơn 10%
+            'volume': '+10%',  # To hơn 10%
+            'gain': 0.8  # 80% playback volume, baked into the WAV
         },
         'motivational': {
             'text':  'Bạn làm rất tốt! Hãy tiếp tục duy trì sự tập trung nhé',
-            'file': 'assets/motivational_voice.mp3',
+            'file': MOTIVATIONAL_VOICE_FILE,
             'voice':  VIETNAMESE_VOICES['female_north'],
             'rate':  '-5%',  # Nói chậm hơn, dễ nghe
-            'volume': '+0%'
+            'volume': '+0%',
+            'gain': 0.6  # 60% playback volume, baked into the WAV
         }
     }
-    
-    # Generate each alert
-    for alert_type, config in alerts.items():
-        await generate_voice(
+
+    # Generate all alerts concurrently — each call is network-bound to
+    # Azure TTS, so gather() cuts wall-clock roughly by the alert count
+    await asyncio.gather(*(
+        generate_voice(
             text=config['text'],
             output_file=config['file'],
             voice=config['voice'],
             rate=config['rate'],
-            volume=config['volume']
+            volume=config['volume'],
+            gain=config['gain']
         )
+        for config in alerts.values()
+    ))
     
     print("=" * 70)
     print("✅ ALL VOICE ALERTS GENERATED SUCCESSFULLY!")
@@ -112,9 +151,12 @@ async def test_voice_preview(text: str = "Xin chào, đây là giọng đọc ti
     print("\n🎧 TESTING VOICES\n")
     
     for name, voice_id in VIETNAMESE_VOICES.items():
-        output = f"assets/test_{name}.mp3"
         print(f"Testing {name} ({voice_id})...")
-        await generate_voice(text, output, voice_id)
+
+    await asyncio.gather(*(
+        generate_voice(text, f"assets/test_{name}.mp3", voice_id)
+        for name, voice_id in VIETNAMESE_VOICES.items()
+    ))
 
 
 if __name__ == "__main__": 
@@ -138,7 +180,7 @@ if __name__ == "__main__":
                 sys.exit(1)
             
             custom_text = sys.argv[2]
-            output_file = "assets/custom_voice.mp3"
+            output_file = CUSTOM_VOICE_FILE
             
             asyncio.run(generate_voice(
                 custom_text,
@@ -7,21 +7,58 @@ Lưu trữ:
 - Event statistics
 - Session summary
 
-Hỗ trợ: 
-- JSON file storage (có thể mở rộng sang DB)
+Hỗ trợ:
+- SQLite metadata store + NDJSON history files
 - Export to CSV/JSON
 - Query by user_id, date range
 """
 
+import io
 import json
+import mmap
 import os
+import sqlite3
+import threading
+
+import orjson
+from collections import OrderedDict
 from datetime import datetime
 from typing import Dict, List, Optional
 from pathlib import Path
 import csv
 
+# Optional: pandas vectorizes the CSV export when available
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+# Optional: zstd compresses per-frame history 5-10x on disk (repetitive
+# keys, similar float magnitudes); decode is ~1 GB/s so cold reads win too
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
+
 from core.focus_scorer import FocusScorer
 
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id       TEXT PRIMARY KEY,
+    user_id          TEXT NOT NULL,
+    session_name     TEXT,
+    started_at       TEXT,
+    ended_at         TEXT,
+    avg_score        REAL,
+    duration_seconds REAL,
+    total_violations INTEGER,
+    focus_level_final TEXT,
+    statistics       TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_user_time ON sessions(user_id, ended_at DESC);
+CREATE INDEX IF NOT EXISTS idx_ended ON sessions(ended_at);
+"""
+
 
 class SessionTracker:
     """
@@ -35,23 +72,109 @@ class SessionTracker:
         """
         self.storage_dir = Path(storage_dir)
         self.storage_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Metadata file
-        self.metadata_file = self.storage_dir / "sessions_metadata.json"
-        self.metadata = self._load_metadata()
-    
-    def _load_metadata(self) -> Dict:
-        """Load metadata từ file"""
-        if self.metadata_file.exists():
-            with open(self.metadata_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {'sessions': {}}
-    
-    def _save_metadata(self):
-        """Lưu metadata ra file"""
-        with open(self.metadata_file, 'w', encoding='utf-8') as f:
-            json.dump(self.metadata, f, indent=2, ensure_ascii=False)
-    
+
+        # Metadata: SQLite thay vì JSON — startup không phải load/parse
+        # toàn bộ metadata, list/cleanup/stats đều chạy qua index thay vì
+        # scan Python. WAL + synchronous=NORMAL cho write throughput;
+        # heavy history vẫn nằm trên đĩa (NDJSON per session)
+        self.db = sqlite3.connect(
+            str(self.storage_dir / "sessions.db"),
+            isolation_level=None,
+            check_same_thread=False
+        )
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_SCHEMA)
+        # One shared connection across the API's threads → serialize access
+        self._db_lock = threading.Lock()
+        self._migrate_legacy_metadata()
+
+        # Parsed-history cache: session_id -> (mtime_ns, size, history),
+        # LRU-evicted under a byte budget (approximated by file size) and
+        # invalidated when the file's stat no longer matches
+        self._history_cache: OrderedDict = OrderedDict()
+        self._history_cache_bytes = 0
+        self._history_cache_max_bytes = (
+            int(os.environ.get('SESSION_HISTORY_CACHE_MB', '64')) * 1024 * 1024
+        )
+        self._history_cache_lock = threading.Lock()
+
+    def _invalidate_history_cache(self, session_id: str):
+        """Gỡ một session khỏi history cache"""
+        with self._history_cache_lock:
+            cached = self._history_cache.pop(session_id, None)
+            if cached is not None:
+                self._history_cache_bytes -= cached[1]
+
+    def _migrate_legacy_metadata(self):
+        """
+        Import metadata từ format cũ (JSONL log hoặc JSON snapshot) vào
+        SQLite — chỉ chạy một lần khi DB còn trống.
+        """
+        with self._db_lock:
+            if self.db.execute("SELECT 1 FROM sessions LIMIT 1").fetchone():
+                return
+
+        sessions = {}
+        jsonl_file = self.storage_dir / "sessions_metadata.jsonl"
+        json_file = self.storage_dir / "sessions_metadata.json"
+
+        if jsonl_file.exists():
+            with open(jsonl_file, 'rb') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    entry = orjson.loads(line)
+                    if entry['op'] == 'add':
+                        session = entry['session']
+                        sessions[session['session_id']] = session
+                    elif entry['op'] == 'del':
+                        sessions.pop(entry['session_id'], None)
+        elif json_file.exists():
+            with open(json_file, 'rb') as f:
+                sessions = orjson.loads(f.read()).get('sessions', {})
+
+        for session in sessions.values():
+            self._upsert_session(session)
+
+    def _upsert_session(self, session: Dict):
+        """INSERT OR REPLACE một session row"""
+        stats = session.get('statistics') or {}
+        with self._db_lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO sessions VALUES (?,?,?,?,?,?,?,?,?,?)",
+                (
+                    session['session_id'],
+                    session['user_id'],
+                    session.get('session_name'),
+                    session.get('started_at'),
+                    session.get('ended_at'),
+                    session.get('avg_score', stats.get('avg_score', 0)),
+                    session.get('duration_seconds', stats.get('duration_seconds', 0)),
+                    session.get('total_violations', stats.get('total_violations', 0)),
+                    session.get('focus_level_final'),
+                    orjson.dumps(stats).decode(),
+                )
+            )
+
+    @staticmethod
+    def _row_to_session(row: sqlite3.Row) -> Dict:
+        """Row → dict cùng shape với metadata entry cũ"""
+        return {
+            'session_id': row['session_id'],
+            'user_id': row['user_id'],
+            'session_name': row['session_name'],
+            'started_at': row['started_at'],
+            'ended_at': row['ended_at'],
+            'statistics': orjson.loads(row['statistics']) if row['statistics'] else {},
+            'focus_level_final': row['focus_level_final'],
+            'avg_score': row['avg_score'],
+            'duration_seconds': row['duration_seconds'],
+            'total_violations': row['total_violations'],
+        }
+
     def create_session_id(self, user_id: str) -> str:
         """
         Tạo session ID unique
@@ -66,67 +189,184 @@ class SessionTracker:
         session_id: str,
         user_id: str,
         scorer: FocusScorer,
-        session_name: Optional[str] = None
+        session_name: Optional[str] = None,
+        stats: Optional[Dict] = None
     ):
         """
         Lưu session data
-        
+
         Args:
             session_id: ID của session
             user_id: ID của user
             scorer: FocusScorer instance chứa data
             session_name: Tên session (optional)
+            stats: Thống kê đã tính sẵn (optional, tránh tính lại)
         """
-        # Get statistics
-        stats = scorer.get_session_stats()
-        
+        # Get statistics (unless the caller already computed them)
+        if stats is None:
+            stats = scorer.get_session_stats()
+
+        # Materialize the scorer's history once (it's a ring-buffer view)
+        history = scorer.history
+
         # Prepare session data
         session_data = {
             'session_id':  session_id,
             'user_id': user_id,
             'session_name': session_name or f"Session {datetime.now().strftime('%Y-%m-%d %H:%M')}",
-            'started_at': datetime.fromtimestamp(scorer.history[0]['timestamp']).isoformat() if scorer.history else None,
-            'ended_at': datetime.fromtimestamp(scorer.history[-1]['timestamp']).isoformat() if scorer.history else None,
+            'started_at': datetime.fromtimestamp(history[0]['timestamp']).isoformat() if history else None,
+            'ended_at': datetime.fromtimestamp(history[-1]['timestamp']).isoformat() if history else None,
             'statistics': stats,
             'focus_level_final': scorer.get_focus_level()[0],
+            # Flat copies of the aggregate inputs so readers don't have to
+            # reach into 'statistics' for the common scalars
+            'avg_score': stats.get('avg_score', 0),
+            'duration_seconds': stats.get('duration_seconds', 0),
+            'total_violations': stats.get('total_violations', 0),
         }
-        
-        # Save detailed history
-        history_file = self.storage_dir / f"{session_id}_history.json"
-        with open(history_file, 'w', encoding='utf-8') as f:
-            json.dump({
-                'session_info': session_data,
-                'history': scorer.history
-            }, f, indent=2, ensure_ascii=False)
-        
-        # Update metadata
-        self.metadata['sessions'][session_id] = session_data
-        self._save_metadata()
-        
+
+        # Save detailed history as NDJSON: one record per line through a
+        # buffered handle. Không build một JSON document khổng lồ trong
+        # memory, và tail reads không phải parse từ đầu file. Session info
+        # đã nằm trong metadata log nên không lặp lại ở đây.
+        if zstd is not None:
+            history_file = self.storage_dir / f"{session_id}_history.ndjson.zst"
+            cctx = zstd.ZstdCompressor(level=3)
+            with open(history_file, 'wb') as f, cctx.stream_writer(f) as w:
+                for record in history:
+                    w.write(orjson.dumps(record) + b'\n')
+            # Đừng để bản uncompressed cũ che bản mới
+            (self.storage_dir / f"{session_id}_history.ndjson").unlink(missing_ok=True)
+        else:
+            history_file = self.storage_dir / f"{session_id}_history.ndjson"
+            with open(history_file, 'wb', buffering=1 << 20) as f:
+                for record in history:
+                    f.write(orjson.dumps(record) + b'\n')
+
+        # History file changed on disk — drop any stale cached parse
+        self._invalidate_history_cache(session_id)
+
+        # Update metadata (một indexed upsert)
+        self._upsert_session(session_data)
+
         print(f"✅ Session {session_id} saved successfully")
-    
+
     def get_session(self, session_id: str) -> Optional[Dict]:
         """
         Lấy thông tin session
-        
+
         Returns:
             Session data hoặc None nếu không tìm thấy
         """
-        return self.metadata['sessions'].get(session_id)
+        with self._db_lock:
+            row = self.db.execute(
+                "SELECT * FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return self._row_to_session(row) if row else None
     
-    def get_session_history(self, session_id: str) -> Optional[List[Dict]]:
+    def get_session_history(
+        self,
+        session_id: str,
+        tail: Optional[int] = None
+    ) -> Optional[List[Dict]]:
         """
         Lấy chi tiết history của session
+
+        Args:
+            session_id: ID của session
+            tail: Chỉ lấy K records cuối (None = toàn bộ)
         """
-        history_file = self.storage_dir / f"{session_id}_history.json"
-        
-        if not history_file.exists():
+        # Prefer the zstd-compressed file, fall back to plain NDJSON
+        compressed = zstd is not None
+        history_file = self.storage_dir / f"{session_id}_history.ndjson.zst"
+        st = None
+        if compressed:
+            try:
+                st = os.stat(history_file)
+            except FileNotFoundError:
+                compressed = False
+        if not compressed:
+            history_file = self.storage_dir / f"{session_id}_history.ndjson"
+            try:
+                st = os.stat(history_file)
+            except FileNotFoundError:
+                return self._get_legacy_history(session_id)
+
+        # Cache hit: same mtime+size means the file hasn't changed, so the
+        # parsed list can be reused without re-reading multi-MB JSON
+        with self._history_cache_lock:
+            cached = self._history_cache.get(session_id)
+            if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+                self._history_cache.move_to_end(session_id)
+                return cached[2] if tail is None else cached[2][-tail:]
+
+        if compressed:
+            # Decompress the whole frame (zstd decode runs ~1 GB/s); tail
+            # queries still only parse the last K lines
+            with open(history_file, 'rb') as f:
+                raw = zstd.ZstdDecompressor().stream_reader(f).read()
+            lines = raw.splitlines()
+            if tail is not None:
+                return [orjson.loads(line) for line in lines[-tail:] if line]
+            history = [orjson.loads(line) for line in lines if line]
+        else:
+            if st.st_size == 0:
+                return []
+
+            if tail is not None:
+                # O(tail) read: mmap the file and rfind-scan backwards for
+                # the last K newlines — đầu file không được đọc lẫn parse,
+                # chỉ phần tail đi qua orjson
+                with open(history_file, 'rb') as f, \
+                        mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    pos = mm.size()
+                    if mm[pos - 1:pos] == b'\n':
+                        pos -= 1
+                    for _ in range(tail):
+                        nl = mm.rfind(b'\n', 0, pos)
+                        if nl < 0:
+                            pos = 0
+                            break
+                        pos = nl
+                    start = pos + 1 if pos > 0 else 0
+                    return [
+                        orjson.loads(line)
+                        for line in mm[start:].splitlines() if line
+                    ]
+
+            # Full read through mmap: one kernel-backed mapping instead of
+            # buffered line iteration, parsed line-by-line with orjson
+            with open(history_file, 'rb') as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                history = [
+                    orjson.loads(line)
+                    for line in bytes(mm).splitlines() if line
+                ]
+
+        with self._history_cache_lock:
+            old = self._history_cache.pop(session_id, None)
+            if old is not None:
+                self._history_cache_bytes -= old[1]
+            self._history_cache[session_id] = (st.st_mtime_ns, st.st_size, history)
+            self._history_cache_bytes += st.st_size
+
+            # Evict least-recently-used entries until under budget
+            while self._history_cache_bytes > self._history_cache_max_bytes and len(self._history_cache) > 1:
+                _, (_, size, _) = self._history_cache.popitem(last=False)
+                self._history_cache_bytes -= size
+
+        return history
+
+    def _get_legacy_history(self, session_id: str) -> Optional[List[Dict]]:
+        """Đọc format cũ (một JSON document {session_info, history})"""
+        legacy_file = self.storage_dir / f"{session_id}_history.json"
+        try:
+            f = open(legacy_file, 'rb')
+        except FileNotFoundError:
             return None
-        
-        with open(history_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            return data.get('history', [])
-    
+        with f:
+            return orjson.loads(f.read()).get('history', [])
+
     def get_user_sessions(self, user_id: str, limit:  int = 50) -> List[Dict]:
         """
         Lấy tất cả sessions của một user
@@ -138,32 +378,25 @@ class SessionTracker:
         Returns:
             List of session data, sorted by date (newest first)
         """
-        user_sessions = [
-            session for session in self.metadata['sessions'].values()
-            if session['user_id'] == user_id
-        ]
-        
-        # Sort by ended_at (newest first)
-        user_sessions.sort(
-            key=lambda x: x.get('ended_at', ''),
-            reverse=True
-        )
-        
-        return user_sessions[:limit]
-    
+        # Indexed range query trên (user_id, ended_at DESC)
+        with self._db_lock:
+            rows = self.db.execute(
+                "SELECT * FROM sessions WHERE user_id = ?"
+                " ORDER BY ended_at DESC LIMIT ?",
+                (user_id, limit)
+            ).fetchall()
+        return [self._row_to_session(row) for row in rows]
+
     def get_all_sessions(self, limit: int = 100) -> List[Dict]:
         """
         Lấy tất cả sessions
         """
-        all_sessions = list(self.metadata['sessions'].values())
-        
-        # Sort by ended_at
-        all_sessions.sort(
-            key=lambda x: x.get('ended_at', ''),
-            reverse=True
-        )
-        
-        return all_sessions[:limit]
+        with self._db_lock:
+            rows = self.db.execute(
+                "SELECT * FROM sessions ORDER BY ended_at DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [self._row_to_session(row) for row in rows]
     
     def delete_session(self, session_id: str) -> bool:
         """
@@ -172,18 +405,24 @@ class SessionTracker:
         Returns:
             True nếu xóa thành công
         """
-        if session_id not in self.metadata['sessions']: 
+        with self._db_lock:
+            cursor = self.db.execute(
+                "DELETE FROM sessions WHERE session_id = ?", (session_id,)
+            )
+        if cursor.rowcount == 0:
             return False
-        
-        # Delete history file
-        history_file = self.storage_dir / f"{session_id}_history.json"
-        if history_file.exists():
-            history_file.unlink()
-        
-        # Remove from metadata
-        del self.metadata['sessions'][session_id]
-        self._save_metadata()
-        
+
+        # Delete history file (zstd/NDJSON, plus legacy JSON nếu còn) —
+        # unlink thẳng thay vì exists()+unlink (một stat syscall mỗi tên)
+        for name in (f"{session_id}_history.ndjson.zst",
+                     f"{session_id}_history.ndjson",
+                     f"{session_id}_history.json"):
+            try:
+                os.unlink(self.storage_dir / name)
+            except FileNotFoundError:
+                pass
+        self._invalidate_history_cache(session_id)
+
         print(f"🗑️ Session {session_id} deleted")
         return True
     
@@ -203,33 +442,58 @@ class SessionTracker:
         if output_path is None:
             output_path = self.storage_dir / f"{session_id}_export.csv"
         
-        # Write CSV
-        with open(output_path, 'w', newline='', encoding='utf-8') as f:
-            if not history: 
-                return str(output_path)
-            
-            # Get all event keys from first record
-            event_keys = list(history[0].get('events', {}).keys())
-            
-            fieldnames = ['timestamp', 'datetime', 'score', 'score_raw', 'penalty', 'recovery'] + event_keys
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            
-            writer.writeheader()
-            for record in history:
-                row = {
-                    'timestamp':  record['timestamp'],
-                    'datetime':  datetime.fromtimestamp(record['timestamp']).isoformat(),
-                    'score': round(record['score'], 2),
-                    'score_raw': round(record['score_raw'], 2),
-                    'penalty':  round(record['penalty'], 2),
-                    'recovery': round(record['recovery'], 2),
-                }
-                
-                # Add event columns
-                for key in event_keys:
-                    row[key] = record['events'].get(key, False)
-                
-                writer.writerow(row)
+        # Get all event keys from first record
+        event_keys = list(history[0].get('events', {}).keys())
+        fieldnames = ['timestamp', 'datetime', 'score', 'score_raw', 'penalty', 'recovery'] + event_keys
+
+        # Vectorized path: build the whole table once and let pandas do the
+        # rounding, timestamp formatting and CSV write in C — per-row Python
+        # dispatch disappears. Falls back to the streaming loop below when
+        # pandas isn't installed.
+        if pd is not None:
+            df = pd.json_normalize(history)
+            df[['score', 'score_raw', 'penalty', 'recovery']] = \
+                df[['score', 'score_raw', 'penalty', 'recovery']].round(2)
+
+            # Same local-time ISO strings as datetime.fromtimestamp()
+            local_tz = datetime.now().astimezone().tzinfo
+            df.insert(1, 'datetime', (
+                pd.to_datetime(df['timestamp'], unit='s', utc=True)
+                .dt.tz_convert(local_tz)
+                .dt.strftime('%Y-%m-%dT%H:%M:%S.%f')
+            ))
+
+            # json_normalize flattens events.* — drop the prefix
+            df.columns = [
+                col[len('events.'):] if col.startswith('events.') else col
+                for col in df.columns
+            ]
+            df[fieldnames].to_csv(output_path, index=False)
+
+            print(f"📊 Session exported to:  {output_path}")
+            return str(output_path)
+
+        # Write CSV through a 1 MiB buffer with plain csv.writer and list
+        # rows: no per-row DictWriter field lookups, and writerows pushes
+        # the loop into C with large write() batches instead of one small
+        # syscall per row
+        raw = open(output_path, 'wb', buffering=1 << 20)
+        with io.TextIOWrapper(raw, encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(fieldnames)
+
+            fromtimestamp = datetime.fromtimestamp
+            writer.writerows(
+                [
+                    record['timestamp'],
+                    fromtimestamp(record['timestamp']).isoformat(),
+                    round(record['score'], 2),
+                    round(record['score_raw'], 2),
+                    round(record['penalty'], 2),
+                    round(record['recovery'], 2),
+                ] + [record['events'].get(key, False) for key in event_keys]
+                for record in history
+            )
         
         print(f"📊 Session exported to:  {output_path}")
         return str(output_path)
@@ -248,35 +512,43 @@ class SessionTracker:
                 'total_violations': int
             }
         """
-        sessions = self.get_user_sessions(user_id, limit=1000)
-        
-        if not sessions:
-            return {
-                'total_sessions':  0,
-                'message': 'No sessions found'
-            }
-        
-        # Calculate statistics
-        total_duration = sum(
-            s['statistics'].get('duration_seconds', 0)
-            for s in sessions
-        )
-        
-        avg_scores = [s['statistics'].get('avg_score', 0) for s in sessions]
-        avg_focus_score = sum(avg_scores) / len(avg_scores) if avg_scores else 0
-        
-        total_violations = sum(
-            s['statistics'].get('total_violations', 0)
-            for s in sessions
-        )
-        
-        # Find best and worst sessions
-        best_session = max(sessions, key=lambda x: x['statistics'].get('avg_score', 0))
-        worst_session = min(sessions, key=lambda x: x['statistics'].get('avg_score', 0))
-        
+        # One indexed aggregate query plus two ORDER BY ... LIMIT 1 lookups
+        # — the flat avg_score/duration/violations columns mean SQLite does
+        # the reduction, no Python loop over sessions
+        with self._db_lock:
+            agg = self.db.execute(
+                "SELECT COUNT(*) AS n,"
+                " COALESCE(SUM(duration_seconds), 0) AS dur,"
+                " COALESCE(AVG(avg_score), 0) AS avg,"
+                " COALESCE(SUM(total_violations), 0) AS viol"
+                " FROM sessions WHERE user_id = ?",
+                (user_id,)
+            ).fetchone()
+
+            if agg['n'] == 0:
+                return {
+                    'total_sessions':  0,
+                    'message': 'No sessions found'
+                }
+
+            best_row = self.db.execute(
+                "SELECT * FROM sessions WHERE user_id = ?"
+                " ORDER BY avg_score DESC LIMIT 1", (user_id,)
+            ).fetchone()
+            worst_row = self.db.execute(
+                "SELECT * FROM sessions WHERE user_id = ?"
+                " ORDER BY avg_score ASC LIMIT 1", (user_id,)
+            ).fetchone()
+
+        total_duration = agg['dur']
+        avg_focus_score = agg['avg']
+        total_violations = agg['viol']
+        best_session = self._row_to_session(best_row)
+        worst_session = self._row_to_session(worst_row)
+
         return {
             'user_id': user_id,
-            'total_sessions': len(sessions),
+            'total_sessions': agg['n'],
             'total_duration_seconds': round(total_duration, 2),
             'total_duration_hours': round(total_duration / 3600, 2),
             'avg_focus_score': round(avg_focus_score, 2),
@@ -308,17 +580,38 @@ class SessionTracker:
         from datetime import timedelta
         
         cutoff_date = (datetime.now() - timedelta(days=days)).isoformat()
-        deleted_count = 0
-        
-        for session_id, session in list(self.metadata['sessions'].items()):
-            ended_at = session.get('ended_at', '')
-            
-            if ended_at and ended_at < cutoff_date: 
-                self.delete_session(session_id)
-                deleted_count += 1
-        
-        print(f"🧹 Cleaned up {deleted_count} old sessions")
-        return deleted_count
+
+        # Batch: một SELECT cho danh sách victims, một DELETE cho cả đợt —
+        # không gọi delete_session K lần (K statements + K prints)
+        with self._db_lock:
+            expired = [
+                row['session_id']
+                for row in self.db.execute(
+                    "SELECT session_id FROM sessions"
+                    " WHERE ended_at IS NOT NULL AND ended_at < ?",
+                    (cutoff_date,)
+                ).fetchall()
+            ]
+            if expired:
+                self.db.execute(
+                    "DELETE FROM sessions WHERE ended_at IS NOT NULL"
+                    " AND ended_at < ?",
+                    (cutoff_date,)
+                )
+
+        # One pass over the files outside the DB lock
+        for session_id in expired:
+            for name in (f"{session_id}_history.ndjson.zst",
+                         f"{session_id}_history.ndjson",
+                         f"{session_id}_history.json"):
+                try:
+                    os.unlink(self.storage_dir / name)
+                except FileNotFoundError:
+                    pass
+            self._invalidate_history_cache(session_id)
+
+        print(f"🧹 Cleaned up {len(expired)} old sessions")
+        return len(expired)
 
 
 # ==================== CLI Interface (Optional) ====================
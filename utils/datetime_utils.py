@@ -1,4 +1,5 @@
 from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Optional
 
 
@@ -45,33 +46,33 @@ def calculate_duration(start: datetime, end:  datetime) -> int:
     Returns:
         Duration in seconds (integer)
     """
-    # Make sure both are timezone-aware
-    start_aware = make_aware(start)
-    end_aware = make_aware(end)
-    
-    # Calculate duration
-    duration = (end_aware - start_aware).total_seconds()
-    return int(duration)
+    # Fast path: cùng tzinfo (thường là cả hai naive) → trừ thẳng,
+    # không allocate hai datetime aware mới
+    if start.tzinfo == end.tzinfo:
+        return int((end - start).total_seconds())
+
+    # Mixed naive/aware: normalize về aware UTC rồi trừ
+    return int((make_aware(end) - make_aware(start)).total_seconds())
 
 
+@lru_cache(maxsize=4096)
 def format_duration(seconds: int) -> str:
     """
     Format duration in seconds to human-readable string.
-    
+
     Examples:
         65 -> "1m 5s"
         3665 -> "1h 1m 5s"
     """
-    hours = seconds // 3600
-    minutes = (seconds % 3600) // 60
-    secs = seconds % 60
-    
-    parts = []
+    # Hai divmod thay vì ba phép chia/mod riêng; kết quả cache theo
+    # seconds vì các duration nhỏ lặp lại liên tục trong logs/UI
+    hours, rem = divmod(seconds, 3600)
+    minutes, secs = divmod(rem, 60)
+
     if hours > 0:
-        parts.append(f"{hours}h")
+        if secs > 0:
+            return f"{hours}h {minutes}m {secs}s" if minutes > 0 else f"{hours}h {secs}s"
+        return f"{hours}h {minutes}m" if minutes > 0 else f"{hours}h"
     if minutes > 0:
-        parts.append(f"{minutes}m")
-    if secs > 0 or not parts:
-        parts.append(f"{secs}s")
-    
-    return " ".join(parts)
\ No newline at end of file
+        return f"{minutes}m {secs}s" if secs > 0 else f"{minutes}m"
+    return f"{secs}s"
\ No newline at end of file
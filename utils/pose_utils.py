@@ -2,6 +2,8 @@
 Pose estimation utilities
 """
 
+from math import radians, sin
+
 import numpy as np
 import cv2
 from typing import Tuple, Optional
@@ -11,9 +13,11 @@ def draw_keypoints(frame: np.ndarray, keypoints: np.ndarray, color=(0, 255, 0)):
     """
     Vẽ keypoints lên frame
     """
-    for x, y in keypoints: 
-        if x > 0 and y > 0:
-            cv2.circle(frame, (int(x), int(y)), 3, color, -1)
+    # Filter + cast một lần bằng NumPy mask thay vì check/convert từng điểm
+    pts = np.asarray(keypoints)
+    pts = pts[(pts[:, 0] > 0) & (pts[:, 1] > 0)].astype(np.int32)
+    for p in pts:
+        cv2.circle(frame, (int(p[0]), int(p[1])), 3, color, -1)
 
 
 def draw_head_direction(
@@ -25,25 +29,26 @@ def draw_head_direction(
     """
     Vẽ hướng nhìn của đầu
     """
-    try:
-        nose = keypoints[0]
-        if nose[0] == 0:
-            return
-        
-        # Calculate arrow endpoint
-        length = 100
-        end_x = int(nose[0] + length * np.sin(np.radians(yaw)))
-        end_y = int(nose[1] + length * np.sin(np.radians(pitch)))
-        
-        cv2.arrowedLine(
-            frame,
-            (int(nose[0]), int(nose[1])),
-            (end_x, end_y),
-            (255, 255, 0),
-            2
-        )
-    except:
-        pass
+    # Explicit checks thay vì try/except bọc cả body: fast path không
+    # setup exception frame, và bug thật sự không bị nuốt
+    if keypoints.size < 2 or keypoints[0, 0] == 0:
+        return
+
+    nose = keypoints[0]
+
+    # Calculate arrow endpoint — scalar math.sin/radians, không cần
+    # NumPy dispatch cho một cặp float
+    length = 100
+    end_x = int(nose[0] + length * sin(radians(yaw)))
+    end_y = int(nose[1] + length * sin(radians(pitch)))
+
+    cv2.arrowedLine(
+        frame,
+        (int(nose[0]), int(nose[1])),
+        (end_x, end_y),
+        (255, 255, 0),
+        2
+    )
 
 
 def get_face_bbox(keypoints: np.ndarray) -> Optional[Tuple[int, int, int, int]]:
@@ -53,26 +58,27 @@ def get_face_bbox(keypoints: np.ndarray) -> Optional[Tuple[int, int, int, int]]:
     Returns:
         (x1, y1, x2, y2) or None
     """
-    try: 
-        # Take face keypoints (0-4:  nose, eyes, ears)
-        face_kpts = keypoints[: 5]
-        valid_kpts = face_kpts[face_kpts[:, 0] > 0]
-        
-        if len(valid_kpts) == 0:
-            return None
-        
-        x1 = int(valid_kpts[: , 0].min())
-        y1 = int(valid_kpts[:, 1].min())
-        x2 = int(valid_kpts[:, 0].max())
-        y2 = int(valid_kpts[:, 1].max())
-        
-        # Add padding
-        padding = 20
-        x1 = max(0, x1 - padding)
-        y1 = max(0, y1 - padding)
-        x2 += padding
-        y2 += padding
-        
-        return x1, y1, x2, y2
-    except:
-        return None
\ No newline at end of file
+    # Shape check up-front thay vì try/except quanh cả body
+    if keypoints.ndim != 2 or keypoints.shape[0] == 0 or keypoints.shape[1] < 2:
+        return None
+
+    # Take face keypoints (0-4:  nose, eyes, ears)
+    face_kpts = keypoints[: 5]
+    valid_kpts = face_kpts[face_kpts[:, 0] > 0]
+
+    if len(valid_kpts) == 0:
+        return None
+
+    # ≤5 điểm: builtin min/max trên list nhanh hơn ufunc reduction —
+    # ở cỡ này NumPy dispatch overhead lấn át phần tính toán
+    xs = valid_kpts[:, 0].tolist()
+    ys = valid_kpts[:, 1].tolist()
+
+    # Add padding
+    padding = 20
+    x1 = max(0, int(min(xs)) - padding)
+    y1 = max(0, int(min(ys)) - padding)
+    x2 = int(max(xs)) + padding
+    y2 = int(max(ys)) + padding
+
+    return x1, y1, x2, y2
\ No newline at end of file
@@ -2,12 +2,30 @@
 Smoothing utilities - EMA filter
 """
 
+# Optional numba JIT: cùng pattern với core/focus_scorer — khi có numba
+# thì bước EMA compile thành native code, không thì chạy Python thường
+try:
+    from numba import njit as _njit
+except ImportError:
+    def _njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        def deco(func):
+            return func
+        return deco
 
-class ExponentialMovingAverage: 
+
+@_njit(cache=True, fastmath=True)
+def _ema_step(prev: float, new_value: float, alpha: float) -> float:
+    """One EMA update on scalars — free function so numba can compile it"""
+    return alpha * new_value + (1.0 - alpha) * prev
+
+
+class ExponentialMovingAverage:
     """
     Exponential Moving Average for smooth score transitions
     """
-    
+
     def __init__(self, alpha: float = 0.3):
         """
         Args:
@@ -16,7 +34,7 @@ class ExponentialMovingAverage:
         """
         self.alpha = alpha
         self.value = None
-        
+
     def update(self, new_value: float) -> float:
         """
         Update EMA với giá trị mới
@@ -24,10 +42,10 @@ class ExponentialMovingAverage:
         if self.value is None:
             self.value = new_value
         else:
-            self.value = self.alpha * new_value + (1 - self.alpha) * self.value
-        
+            self.value = _ema_step(self.value, new_value, self.alpha)
+
         return self.value
-    
+
     def reset(self):
         """Reset EMA"""
-        self.value = None
\ No newline at end of file
+        self.value = None